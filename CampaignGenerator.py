@@ -0,0 +1,793 @@
+import copy
+import json
+import os
+import re
+import zlib
+from functools import cached_property
+
+import numpy as np
+from Character import Character
+from GarrisonGenerator import GarrisonGenerator
+from input_cache import cached
+from NameRegistry import NameRegistry
+from Profiler import Profiler
+from RegionGraph import RegionGraph
+from ReligionMatrix import ReligionMatrix
+from SpatialGrid import SpatialGrid
+from map_extraction import read_tga, index_settlements, find_settlement_coords, placeable_mask, passable_mask, \
+    region_adjacency, label_components, tile_mask
+from output_writer import read_text, write_chunks
+from regions_parser import parse_regions, regions_chunks
+from strat_parser import parse_strat, strat_chunks
+from text_extraction import faction_religions_from_sm_factions, fortification_locations_from_strat
+from validator import error_key, validate_factions
+
+# Global File Parameters
+SEED = 43
+PATH = "campaign/"
+SCENARIO_RECORD = "scenario.json"  # Written beside each generated scenario, see reroll
+CACHE_DIR = "cache/"  # Parsed inputs are cached here between runs, None disables the cache
+
+# Global Generation Parameters
+FUNDS_DEF = 5000
+FUNDS_PER = 1000  # Starting gold per starting char
+PURSE_DEF = 500
+PURSE_PER = 250  # Extra per-turn income per starting char
+CITIES_PER = 1
+STARTING_CULT = 33  # Starting religion of faction's capital province
+NEIGHBOUR_CULT = 0  # Starting religion of the provinces bordering the capital, 0 leaves them as they were
+REMOVE_GENERALS = True
+PLACEMENT_MODE = "sample"  # "sample" picks from every valid tile near the capital, "reject" retries random tiles
+PLACEMENT_MODES = ("sample", "reject")
+PLACEMENT_RADIUS = 10  # Max distance (in tiles) of starting characters from their capital
+PLACEMENT_MAX_RADIUS = 40  # Radius is widened up to this if there aren't enough valid tiles near the capital
+REQUIRE_REACHABLE = True  # Characters must be placed on land connected to their capital
+REJECT_TRIES = 1000  # In "reject" mode, tiles tried before giving up on keeping a character connected to the capital
+REJECT_MAX_TRIES = 10000  # In "reject" mode, tiles tried before giving up on placing a character at all
+CAPITAL_MIN_DISTANCE = 30  # Min distance (in tiles) between faction capitals, 0 places them purely at random
+
+
+class CampaignGenerator:
+    """
+    Generates randomised starting scenarios (descr_strat & descr_regions) from a campaign.
+    Campaign inputs (strat, regions, maps, names, faction religions) are only loaded the first time they're needed, then kept
+    so repeated generations reuse them. Parsed inputs & map lookups are also cached on disk (see input_cache), so later
+    runs skip parsing until the campaign files change.
+
+    """
+    @cached_property
+    def strat(self):
+        """
+        Parsed descr_strat, with the factions split into those which change & those which don't
+
+        :return: Campaign Info, Invariants[], Factions[], Diplomacy
+        """
+        def build():
+            with open(self.path + "descr_strat.txt", "r") as d_strat:
+                campaign, factions, diplomacy = parse_strat(d_strat.read())
+            self.profiler.count("characters.parsed", sum(len(fac.characters) for fac in factions))
+            invariants = factions[-3:-1]  # Some factions shouldn't change positions (dark lord, scripts, etc)
+            del factions[-3]
+            del factions[-2]
+
+            for faction in factions:
+                faction.characters = [ch for ch in faction.characters if ch.type != "admiral"]  # also drop admirals
+            return campaign, invariants, factions, diplomacy
+        return cached(self.cache_dir, "strat", [self.path + "descr_strat.txt"], build)
+
+    @cached_property
+    def regions(self):
+        """
+        Parsed descr_regions
+
+        :return: text before the first region, Region table keyed by province name
+        """
+        def build():
+            with open(self.path + "descr_regions.txt", "r") as d_regions:
+                return parse_regions(d_regions.read())
+        return cached(self.cache_dir, "regions", [self.path + "descr_regions.txt"], build)
+
+    @cached_property
+    def names(self):
+        """
+        Free character names for each faction
+
+        :return: NameRegistry loaded from descr_names
+        """
+        def build():
+            with open("descr_names.txt", "r") as d_names:
+                return NameRegistry(d_names.read())
+        return cached(self.cache_dir, "names", ["descr_names.txt"], build)
+
+    @cached_property
+    def faction_religions(self):
+        """
+        Religion of each faction, from descr_sm_factions
+
+        :return: dict of faction name -> religion
+        """
+        with open("descr_sm_factions.txt", "r") as sm_factions:
+            return faction_religions_from_sm_factions(sm_factions.read())
+
+    @cached_property
+    def garrisons(self):
+        """
+        Culture-specific garrison templates
+
+        :return: GarrisonGenerator with its templates loaded
+        """
+        gen = GarrisonGenerator()
+        gen.__load_templates__()
+        return gen
+
+    @cached_property
+    def maps(self):
+        """
+        Pixels of the TGA maps, with y=0 the bottom row
+
+        :return: map_regions, map_ground_types & map_features arrays, see read_tga
+        """
+        self.profiler.count("maps.read", 3)
+        m_regions = read_tga(self.path + "map_regions.tga")  # Need for settlement location information
+        m_ground_types = read_tga(self.path + "map_ground_types.tga")  # To track valid/invalid tiles
+        m_rivers = read_tga(self.path + "map_features.tga")  # For invalid river tiles
+        return m_regions, m_ground_types, m_rivers
+
+    @cached_property
+    def settlement_coords(self):
+        """
+        Settlement & port tiles by region colour, rather than scanning the map for every lookup
+
+        :return: settlement index, port index; see index_settlements
+        """
+        return cached(self.cache_dir, "settlement_coords", [self.path + "map_regions.tga"],
+                      lambda: index_settlements(self.maps[0]))
+
+    @cached_property
+    def religion_matrix(self):
+        """
+        Religion strengths of every region in descr_regions, as one array
+
+        :return: ReligionMatrix
+        """
+        return ReligionMatrix(self.regions[1])
+
+    @cached_property
+    def adjacency(self):
+        """
+        Which provinces border each other, for neighbourhood queries
+
+        :return: RegionGraph built from map_regions
+        """
+        sources = [self.path + "map_regions.tga", self.path + "descr_regions.txt"]
+        return cached(self.cache_dir, "adjacency", sources,
+                      lambda: RegionGraph(self.regions[1], region_adjacency(self.maps[0])))
+
+    @cached_property
+    def placeable(self):
+        """
+        Which tiles have valid terrain for characters, for the whole map
+
+        :return: boolean array, see placeable_mask
+        """
+        sources = [self.path + m for m in ("map_regions.tga", "map_ground_types.tga", "map_features.tga")]
+        return cached(self.cache_dir, "placeable", sources, lambda: placeable_mask(*self.maps))
+
+    @cached_property
+    def components(self):
+        """
+        Connected areas of passable land, so characters can be kept to the area their capital is in
+
+        :return: int array labelling each area, see label_components
+        """
+        sources = [self.path + "map_regions.tga", self.path + "map_ground_types.tga"]
+        return cached(self.cache_dir, "components", sources,
+                      lambda: label_components(passable_mask(self.maps[0], self.maps[1])))
+
+    @cached_property
+    def fortified(self):
+        """
+        Characters can't be placed on or next to forts & watchtowers
+
+        :return: boolean array, True on & around each fort/watchtower
+        """
+        return tile_mask(fortification_locations_from_strat(self.strat[3]), self.placeable.shape, spread=1)
+
+    def load(self):
+        """
+        Loads every campaign input which hasn't been loaded yet, so later steps don't pay for it
+
+        :return:
+        """
+        for name in ("strat", "regions", "religion_matrix", "names", "faction_religions", "garrisons",
+                     "settlement_coords", "placeable", "components", "fortified"):
+            if name not in self.__dict__:
+                with self.profiler.stage("load." + name):
+                    getattr(self, name)
+
+    def stream(self, *key):
+        """
+        Spawns an independent random generator for one part of the scenario (a faction's placement, a garrison, etc)
+        from the scenario seed. Each key gets the same stream whatever was drawn before it, so one faction's or
+        garrison's draws don't shift another's. Garrisons depend on nothing else, but placement still checks tiles
+        against the characters already placed, so where a faction's characters end up depends on faction order.
+
+        :param key: names identifying the stream, ie. ("placement", faction name)
+        :return: numpy Generator
+        """
+        words = [zlib.crc32(str(k).encode()) for k in key]  # unlike hash(), crc32 is the same in every process
+        return np.random.default_rng(np.random.SeedSequence([self.seed] + words))
+
+    def setup_factions(self):
+        """
+        Takes a fresh copy of the parsed factions for a new scenario, pooling their settlements globally.
+        Factions keep their own details (family trees, armies, etc)
+
+        :return: Factions, Settlements, OrigSettlements
+        """
+        factions = copy.deepcopy(self.strat[2])
+        settlements = []  # all settlements in the map
+        orig_settlements = []  # original settlements assigned to each faction
+        for faction in factions:
+            settlements.extend(faction.settlements)
+            if faction.name != "slave":
+                orig_settlements.append(faction.settlements)  # don't include slave in original settlements
+
+        self.locate_settlements(settlements)
+        return factions, settlements, orig_settlements
+
+    def locate_settlements(self, settlements):
+        """
+        Looks up each settlement's region colour & map position
+
+        :param settlements: Settlements
+        :return:
+        """
+        for settlement in settlements:
+            settlement.colour = self.regions[1][settlement.name].colour
+            settlement.settlement_location = find_settlement_coords(settlement.colour, self.settlement_coords[0])
+
+    def assign_settlements(self, settlements, factions):
+        """
+        Assign random starting locations to each faction
+
+        :param settlements: Settlements
+        :param factions: Factions
+        :return:
+        """
+        picks = self.pick_capitals(settlements, len(factions)-1, self.stream("capitals"))
+        for fac, i in zip(factions[:-1], picks):
+            fac.settlements = [settlements[i]]
+
+        # Add all remaining settlements to rebels
+        taken = set(picks)
+        factions[-1].settlements = [s for i, s in enumerate(settlements) if i not in taken]
+
+    def pick_capitals(self, candidates, count, rng, capitals=()):
+        """
+        Picks capitals at random, at least capital_min_distance tiles from each other & from any existing capitals.
+        Settlements too close to a capital are found through a SpatialGrid, so each pick only looks at its
+        neighbourhood. If no candidate is far enough away the rule is dropped for that pick.
+
+        :param candidates: Settlements which can become capitals
+        :param count: number of capitals to pick
+        :param rng: numpy Generator to draw from
+        :param capitals: X, Y of capitals already placed
+        :return: indexes into candidates, in the order picked
+        """
+        coords = np.array([s.settlement_location for s in candidates], dtype=np.float64).reshape(-1, 2)
+        taken = np.zeros(len(candidates), dtype=bool)
+        allowed = np.ones(len(candidates), dtype=bool)
+        spacing = self.capital_min_distance
+        grid = SpatialGrid(coords, spacing) if spacing > 0 else None
+        if grid:
+            for pos in capitals:
+                allowed[grid.query_radius(pos, spacing)] = False
+
+        picks = []
+        for _ in range(count):
+            options = np.flatnonzero(allowed & ~taken)
+            if not len(options):
+                options = np.flatnonzero(~taken)
+                self.profiler.count("capitals.unspaced")
+            i = int(options[rng.choice(len(options))])
+            taken[i] = True
+            if grid:
+                allowed[grid.query_radius(coords[i], spacing)] = False
+            picks.append(i)
+        return picks
+
+    def occupancy_grid(self, facs):
+        """
+        Counts the characters standing on each tile of the map
+
+        :param facs: Factions whose characters occupy tiles
+        :return: int array of shape (width, height)
+        """
+        occupied = np.zeros(self.placeable.shape, dtype=np.int32)
+        for fac in facs:
+            for ch in fac.characters:
+                self.occupy(occupied, ch.position, 1)
+        return occupied
+
+    @staticmethod
+    def occupy(occupied, pos, count):
+        """
+        Adds characters to (or with a negative count, removes them from) a tile of the occupancy grid
+
+        :param occupied: occupancy grid, see occupancy_grid
+        :param pos: X, Y of the tile
+        :param count: number of characters entering the tile
+        :return:
+        """
+        width, height = occupied.shape
+        if 0 <= pos[0] < width and 0 <= pos[1] < height:
+            occupied[pos[0], pos[1]] += count
+
+    def capital_component(self, capital):
+        """
+        Finds which connected area of land (see components) characters of a capital must be placed in
+
+        :param capital: X, Y of the capital
+        :return: label of the capital's area, or 0 if placement isn't restricted to it
+        """
+        width, height = self.components.shape
+        if not self.require_reachable or not (0 <= capital[0] < width and 0 <= capital[1] < height):
+            return 0
+        return int(self.components[capital[0], capital[1]])
+
+    def tile_is_valid(self, x, y, occupied, component=0):
+        """
+        Ensures a chosen tile is valid to be placed on provided the terrain is adequate
+
+        :param x: x coord
+        :param y: y coord
+        :param occupied: occupancy grid of all non-rebel characters, see occupancy_grid
+        :param component: area of land the tile must be in, see capital_component (0 for any)
+        :return: True if position is available, False otherwise
+        """
+        self.profiler.count("tile_is_valid.calls")
+        width, height = self.placeable.shape
+        if not (0 <= x < width and 0 <= y < height) or not self.placeable[x, y]:
+            return False  # off the map, or terrain/settlement/sea/river isn't placeable (see placeable_mask)
+
+        if component and self.components[x, y] != component:
+            return False  # cut off from the capital by sea, mountains or impassable ground
+
+        if self.fortified[x, y]:
+            return False  # if fort/watchtower is on or next to the position
+
+        if occupied[x, y]:
+            return False  # characters shouldn't overlap, whether from the same faction or not
+            # TODO: side effect, chars can't be put @ original pos's of their own faction
+
+        return True
+
+    def placement_candidates(self, capital, radius, occupied, component=0):
+        """
+        Lists every valid tile (see tile_is_valid) within some radius of a capital in one step
+
+        :param capital: X, Y of the capital
+        :param radius: max distance from the capital along either axis
+        :param occupied: occupancy grid of all non-rebel characters, see occupancy_grid
+        :param component: area of land the tiles must be in, see capital_component (0 for any)
+        :return: array of shape (n, 2) containing the X, Y of each valid tile
+        """
+        width, height = self.placeable.shape
+        x0, x1 = max(capital[0]-radius, 0), min(capital[0]+radius+1, width)
+        y0, y1 = max(capital[1]-radius, 0), min(capital[1]+radius+1, height)
+        valid = self.placeable[x0:x1, y0:y1] & ~self.fortified[x0:x1, y0:y1] & (occupied[x0:x1, y0:y1] == 0)
+        if component:
+            valid &= self.components[x0:x1, y0:y1] == component
+        self.profiler.count("placement_candidates.scans")
+        self.profiler.count("placement_candidates.tiles", valid.size)
+        return np.argwhere(valid) + (x0, y0)
+
+    def sample_positions(self, capital, count, occupied, name, rng, component=0):
+        """
+        Picks distinct valid tiles around a capital for a faction's characters, widening the search if required.
+        If the capital's area of land is too small for them all, the characters may be placed outside it.
+
+        :param capital: X, Y of the capital
+        :param count: number of tiles required
+        :param occupied: occupancy grid of all non-rebel characters, see occupancy_grid
+        :param name: name of the faction, for error reporting
+        :param rng: numpy Generator to draw from
+        :param component: area of land the tiles should be in, see capital_component (0 for any)
+        :return: array of shape (count, 2) containing the X, Y of each chosen tile
+        """
+        radius = self.placement_radius
+        candidates = self.placement_candidates(capital, radius, occupied, component)
+        while len(candidates) < count and radius < self.placement_max_radius:
+            radius = min(max(radius, 1) * 2, self.placement_max_radius)  # a radius of 0 would never grow
+            self.profiler.count("placement.widened")
+            candidates = self.placement_candidates(capital, radius, occupied, component)
+
+        if len(candidates) < count and component:
+            self.profiler.count("placement.unreachable")
+            candidates = self.placement_candidates(capital, radius, occupied)
+
+        if len(candidates) < count:
+            raise RuntimeError("Can't place " + str(count) + " characters for " + name + ": only "
+                               + str(len(candidates)) + " valid tiles within " + str(radius)
+                               + " tiles of the capital at " + str(capital))
+        return candidates[rng.choice(len(candidates), count, replace=False)]
+
+    def get_template(self, name):
+        """
+        Retrieves a default character/army template, reading each template file only once
+
+        :param name: name of the template in defaults/ (diplomat, rebel_army, etc)
+        :return: template text
+        """
+        if name not in self.templates:
+            self.profiler.count("templates.read")
+            with open("defaults/" + name + ".txt", "r") as template:
+                self.templates[name] = template.read()
+        return self.templates[name]
+
+    def add_agents(self, typ, facs):
+        """
+        Adds the corresponding type of agent to a faction if the faction lacks
+
+        :param typ: Type of agent (spy, diplomat)
+        :param facs: Factions
+        :return:
+        """
+        for fac in facs:
+            agent = self.get_template(typ)  # default diplomat
+            has = False
+            for ch in fac.characters:
+                if ch.type == typ:
+                    has = True  # ignore factions with the agent
+            if not has:
+                name = self.names.take(fac, self.stream("agents", fac.name))
+                agent = Character(re.sub(r"NAME", name, agent))
+                agent.parse_text()
+                self.profiler.count("characters.parsed")
+                fac.characters.append(agent)
+
+    def assign_chars(self, f, occupied):
+        """
+        Assigns starting locations for characters to be centered around the faction's starting settlement
+
+        :param f: Factions
+        :param occupied: occupancy grid of all non-rebel characters, kept up to date as characters move
+        :return:
+        """
+        for fac in f[:-1]:  # in order, as each faction's placement sees the characters placed before it
+            capital = fac.settlements[0].settlement_location
+            component = self.capital_component(capital)
+            rng = self.stream("placement", fac.name)
+            radius = max(self.placement_radius, 1)
+            if self.placement_mode == "sample":
+                count = sum(1 for ch in fac.characters if not ch.leader)
+                positions = iter(self.sample_positions(capital, count, occupied, fac.name, rng, component))
+
+            old_positions = [ch.position for ch in fac.characters]
+            for ch in fac.characters:
+                if ch.leader:  # don't need to check availability for leaders; always in a settlement
+                    pos = capital
+                elif self.placement_mode == "sample":
+                    pos = next(positions)
+                else:
+                    offset = rng.integers(-radius, radius+1, 2)
+                    pos = capital + offset
+                    tries = 0
+                    while not self.tile_is_valid(pos[0], pos[1], occupied, component):
+                        self.profiler.count("tile_is_valid.rejected")
+                        tries += 1
+                        if component and tries == REJECT_TRIES:
+                            component = 0  # capital's area of land is full, so allow tiles outside it
+                            self.profiler.count("placement.unreachable")
+                        if tries == REJECT_MAX_TRIES:
+                            raise RuntimeError("Can't place a character for " + fac.name + ": no valid tile found in "
+                                               + str(tries) + " tries within " + str(radius)
+                                               + " tiles of the capital at " + str(capital))
+                        offset = rng.integers(-radius, radius+1, 2)
+                        pos = capital + offset
+                ch.position = (int(pos[0]), int(pos[1]))
+                self.profiler.count("characters.placed")
+                self.occupy(occupied, ch.position, 1)
+
+            for pos in old_positions:
+                self.occupy(occupied, pos, -1)  # original positions are now free
+
+    def garrisons_to_abandoned(self):
+        """
+        Assigns culture-appropriate garrisons to rebel settlements.
+
+        :return:
+        """
+        new_chars = []
+        for i, settles in enumerate(self.orig_settlements):
+            fac = self.factions[i].name
+            for city in settles:
+                used = False
+                for fact in self.factions[:-1]:
+                    if city in fact.settlements:
+                        used = True
+
+                if not used:  # if the abandoned settlement is not in use by any faction then we add rebel army
+                    new_chars.append(self.garrison_army(fac, city))
+        self.factions[-1].characters.extend(new_chars)
+
+    def garrison_army(self, fac, city):
+        """
+        Creates a rebel army garrisoning an abandoned settlement, with units from its original faction's culture
+
+        :param fac: name of the faction which originally held the settlement
+        :param city: Settlement to garrison
+        :return: rebel Character
+        """
+        template = self.get_template("rebel_army")
+        template = re.sub(r"#FAC#", fac, template)
+
+        new_army = self.garrisons.generate_garrisons(fac, city.tier, self.stream("garrison", city.name))
+        self.profiler.count("garrisons.generated")
+
+        for unit in new_army:
+            template += unit + "\n"
+        template += "\n"
+
+        # now we update the x, y of the new army
+        army = Character(template)
+        army.parse_text()
+        self.profiler.count("characters.parsed")
+        army.position = city.settlement_location
+        return army
+
+    def update_funds(self):
+        """
+        Naively adjusts funds based on number of characters in faction
+
+        :return:
+        """
+        for fac in self.factions[:-1]:
+            chars = len(fac.characters)+1   # Obtain starting number of chars
+            fac.start_money = self.funds_def+chars*self.funds_per
+            fac.kings_purse = self.purse_def+chars*self.purse_per
+
+    def update_culture(self, facs):
+        """
+        Ensures factions have some amount of starting culture in their new capital (and, with neighbour_cult, the
+        provinces bordering it). Every capital is converted at once on a copy of the religion matrix, taking the
+        strength from each region's strongest religion, then the changed regions are normalised back to their totals.
+        Neighbours whose entry doesn't list the faction's religion are left as they are.
+
+        :param facs: All factions to update cultures for
+        :return: dict of changed province name -> new religion strengths
+        """
+        matrix = self.religion_matrix.copy()
+        capitals = [fac.settlements[0].name for fac in facs]
+        religions = [self.faction_religions[fac.name] for fac in facs]
+        rows = matrix.convert(capitals, religions, self.starting_cult)
+
+        if self.neighbour_cult:
+            taken = set(capitals)
+            near = [(name, rel) for capital, rel in zip(capitals, religions)
+                    for name in self.adjacency.neighbours(capital) if name not in taken]
+            if near:
+                names, rels = zip(*near)
+                rows = np.union1d(rows, matrix.convert(names, rels, self.neighbour_cult, skip_unlisted=True))
+
+        matrix.normalise(rows)
+        return matrix.changes(rows)
+
+    @staticmethod
+    def disable_overlapping_armies(target, occupied):
+        """
+        Removes all armies from faction target which overlap with a force from any other faction
+
+        :param target: Target faction
+        :param occupied: occupancy grid of the remaining factions' characters, see occupancy_grid
+        :return:
+        """
+        width, height = occupied.shape
+        new_chs = []
+        for ch in target.characters:
+            x, y = ch.position
+            if not (0 <= x < width and 0 <= y < height) or not occupied[x, y]:
+                new_chs.append(ch)  # only use armies who have NO overlap; those off the map can't overlap anything
+        target.characters = new_chs
+
+    def write_regions(self, cults, target, regions=None):
+        """
+        Writes the new culture ratios to descr_regions
+
+        :param cults: new religion strengths for each capital province, see update_culture
+        :param target: path or file-like object to write to, see write_chunks
+        :param regions: header & Region table to write the changes into (default: the campaign's descr_regions)
+        :return:
+        """
+        header, table = regions or self.regions
+        write_chunks(target, regions_chunks(header, table, cults))
+
+    def write(self, target, changed=None):
+        """
+        Writes the generated scenario to descr_strat
+
+        :param target: path or file-like object to write to, see write_chunks
+        :param changed: names of the factions to write out afresh, the rest are copied as they were read (default: all)
+        :return:
+        """
+        campaign, invariants, _, diplomacy = self.strat
+        write_chunks(target, strat_chunks(campaign, invariants + self.factions, diplomacy, changed))
+
+    def write_record(self, target, record):
+        """
+        Writes the scenario record, which lets a generated scenario be rerolled later
+
+        :param target: path or file-like object to write to, see write_chunks
+        :param record: dict of the scenario's seed & rerolls
+        :return:
+        """
+        write_chunks(target, [json.dumps(record, indent=1)])
+
+    def validate(self, out_dir):
+        """
+        Checks a generated scenario against the maps & regions, see validate_factions
+
+        :param out_dir: directory the scenario was written to
+        :return: validation report
+        """
+        _, factions, _ = parse_strat(read_text(os.path.join(out_dir, "descr_strat.txt")))
+        settlements = tile_mask(self.settlement_coords[0].values(), self.placeable.shape)
+        playable = {fac.name for fac in self.strat[2][:-1]}
+
+        # Problems in the campaign itself (rebel armies the mod placed on mountains, etc) aren't the seed's fault
+        source = validate_factions(self.strat[1] + self.strat[2], self.regions[1], self.placeable, settlements,
+                                   playable)
+        inherited = [error_key(e) for e in source["errors"]]
+        return validate_factions(factions, self.regions[1], self.placeable, settlements, playable, inherited)
+
+    def load_scenario(self, out_dir):
+        """
+        Reads a generated scenario back in from its output directory
+
+        :param out_dir: directory the scenario was written to
+        :return: scenario record, Factions[] (excluding the invariants), descr_regions header & Region table, and the
+        suffix of the scenario's files ("" or ".gz" if it was compressed)
+        """
+        with open(os.path.join(out_dir, SCENARIO_RECORD), "r") as f:
+            record = json.load(f)
+        _, factions, _ = parse_strat(read_text(os.path.join(out_dir, "descr_strat.txt")))
+        self.profiler.count("characters.parsed", sum(len(fac.characters) for fac in factions))
+        header, regions = parse_regions(read_text(os.path.join(out_dir, "descr_regions.txt")))
+        suffix = "" if os.path.exists(os.path.join(out_dir, "descr_strat.txt")) else ".gz"
+        return record, factions[len(self.strat[1]):], header, regions, suffix
+
+    def reroll(self, out_dir, names, seed=None):
+        """
+        Re-rolls the starting position of some factions in a generated scenario, leaving every other faction as it was.
+        The chosen factions give up their capitals to the rebels & are given new ones from the rebel settlements, their
+        characters are placed around the new capital, and garrisons & cultures are updated to match.
+        Only the affected faction & region blocks are rewritten.
+
+        :param out_dir: directory the scenario was written to, see generate
+        :param names: names of the factions to reroll, each given once
+        :param seed: seed for the reroll's random choices (default: derived from the scenario seed & reroll count)
+        :return: seed used
+        """
+        if len(set(names)) != len(names):
+            raise ValueError("Can't reroll " + ", ".join(names) + ": factions are listed more than once")
+        self.profiler.reset()
+        record, self.factions, header, regions, suffix = self.load_scenario(out_dir)
+        by_name = {fac.name: fac for fac in self.factions[:-1]}
+        for name in names:
+            if name not in by_name:
+                raise ValueError("Can't reroll " + name + ": not a playable faction of the scenario")
+        targets = [by_name[name] for name in names]
+        rebels = self.factions[-1]
+        if seed is None:
+            seed = int(np.random.SeedSequence([record["seed"], len(record["rerolls"])+1]).generate_state(1)[0])
+        self.seed = seed
+        self.load()
+
+        # Return the capitals to the rebels, then hand out new ones
+        released = []
+        for fac in targets:
+            released.extend(fac.settlements)
+            rebels.settlements.extend(fac.settlements)
+            fac.settlements = []
+        self.locate_settlements(rebels.settlements)
+        released_names = {s.name for s in released}
+        pool = [s for s in rebels.settlements if s.name not in released_names]
+        self.locate_settlements([fac.settlements[0] for fac in self.factions[:-1] if fac.settlements])
+        kept = [fac.settlements[0].settlement_location for fac in self.factions[:-1] if fac.settlements]
+        for fac, i in zip(targets, self.pick_capitals(pool, len(targets), self.stream("capitals"), kept)):
+            rebels.settlements.remove(pool[i])
+            fac.settlements = [pool[i]]
+
+        # Cultures are worked out afresh for every capital, as generate would for these capitals, so released capitals
+        # get their original culture back & the shifts of kept capitals bordering new ones (see neighbour_cult) stay
+        cultures = {name: self.regions[1][name].strengths for name, region in regions.items()
+                    if region.strengths != self.regions[1][name].strengths}
+        cultures.update(self.update_culture([fac for fac in self.factions[:-1] if fac.settlements]))
+
+        # Move the characters; rebel armies in the way (including a new capital's garrison) are disbanded
+        occupied = self.occupancy_grid(self.factions[:-1])
+        self.assign_chars(targets + [rebels], occupied)
+        self.disable_overlapping_armies(rebels, occupied)
+
+        # Released capitals are now abandoned, so garrison them in the culture of whoever held them originally, or give
+        # the rebels back the armies they started with there
+        owners = {s.name: fac.name for fac in self.strat[2] for s in fac.settlements}
+        source_rebels = self.strat[2][-1]
+        for city in released:
+            if owners.get(city.name) == source_rebels.name:
+                rebels.characters.extend(copy.deepcopy(ch) for ch in source_rebels.characters
+                                         if tuple(ch.position) == tuple(city.settlement_location))
+            elif city.name in owners:
+                rebels.characters.append(self.garrison_army(owners[city.name], city))
+
+        changed = set(names) | {rebels.name}
+        self.write(os.path.join(out_dir, "descr_strat.txt" + suffix), changed)
+        self.write_regions(cultures, os.path.join(out_dir, "descr_regions.txt" + suffix), (header, regions))
+        record["rerolls"].append({"factions": list(names), "seed": seed})
+        self.write_record(os.path.join(out_dir, SCENARIO_RECORD), record)
+        return seed
+
+    def generate(self, seed=SEED, out_dir="", compress=False):
+        """
+        Generates a new scenario from the loaded campaign files & writes it to out_dir.
+        Each call starts from the parsed campaign afresh, so the same seed always produces the same scenario.
+
+        :param seed: seed for the scenario's random choices
+        :param out_dir: directory to write descr_strat & descr_regions to
+        :param compress: gzip the output files (descr_strat.txt.gz, etc)
+        :return:
+        """
+        self.profiler.reset()
+        self.load()
+        self.seed = seed
+        self.names.reset()
+        with self.profiler.stage("setup_factions"):
+            self.factions, settlements, self.orig_settlements = self.setup_factions()
+
+        # Re-assign starting locations & export
+        with self.profiler.stage("add_agents"):
+            self.add_agents("diplomat", self.factions[:-1])
+        with self.profiler.stage("assign_settlements"):
+            self.assign_settlements(settlements, self.factions)
+        with self.profiler.stage("update_culture"):
+            cultures = self.update_culture(self.factions[:-1])
+        with self.profiler.stage("assign_chars"):
+            occupied = self.occupancy_grid(self.factions[:-1])
+            self.assign_chars(self.factions, occupied)
+        with self.profiler.stage("disable_overlapping_armies"):
+            rebels = len(self.factions[-1].characters)
+            self.disable_overlapping_armies(self.factions[-1], occupied)
+            self.profiler.count("rebel_armies.removed", rebels-len(self.factions[-1].characters))
+        with self.profiler.stage("garrisons_to_abandoned"):
+            self.garrisons_to_abandoned()
+        with self.profiler.stage("update_funds"):
+            self.update_funds()
+        suffix = ".gz" if compress else ""
+        with self.profiler.stage("write"):
+            self.write(os.path.join(out_dir, "descr_strat.txt" + suffix))
+        with self.profiler.stage("write_regions"):
+            self.write_regions(cultures, os.path.join(out_dir, "descr_regions.txt" + suffix))
+        self.write_record(os.path.join(out_dir, SCENARIO_RECORD), {"seed": seed, "rerolls": []})
+
+    def __init__(self, path=PATH, cache_dir=CACHE_DIR):
+        self.path = path  # campaign directory holding descr_strat, descr_regions & the TGA maps
+        self.cache_dir = cache_dir
+        self.funds_def = FUNDS_DEF
+        self.funds_per = FUNDS_PER
+        self.purse_def = PURSE_DEF
+        self.purse_per = PURSE_PER
+        self.cities_per = CITIES_PER
+        self.starting_cult = STARTING_CULT
+        self.neighbour_cult = NEIGHBOUR_CULT
+        self.remove_generals = REMOVE_GENERALS
+        self.placement_mode = PLACEMENT_MODE
+        self.placement_radius = PLACEMENT_RADIUS
+        self.placement_max_radius = PLACEMENT_MAX_RADIUS
+        self.capital_min_distance = CAPITAL_MIN_DISTANCE
+        self.require_reachable = REQUIRE_REACHABLE
+        self.templates = {}  # Default character/army templates, see get_template
+        self.profiler = Profiler()  # Stage timings & counters of the last generation
+        self.seed = SEED  # Seed of the scenario being generated, see stream
+        self.factions = []  # Per-scenario state, set up by generate
+        self.orig_settlements = []
@@ -1,12 +1,21 @@
+import re
+from text_extraction import character_coords_from_strat
+
+POSITION = re.compile(r"(x\s+)([0-9]+)(,\s*y\s+)([0-9]+)")
+
 
 class Character:
     """
     Represents a character on the campaign map, including position, army composition and character name.
 
     """
+    __slots__ = ("position", "name", "type", "leader", "text")
+
     def __init__(self, text):
         self.position = (0, 0)
         self.name = ""
+        self.type = ""  # named character, general, diplomat, spy, admiral, etc
+        self.leader = False
         self.text = text
 
     def parse_text(self):
@@ -15,4 +24,20 @@ class Character:
 
         :return:
         """
-        return None
+        line = self.text.lstrip().split("\n", 1)[0]
+        fields = [f.strip() for f in line[len("character"):].split(",")]
+        if fields[0].startswith("sub_faction"):
+            fields = fields[1:]  # rebel & script characters belong to a sub faction
+        self.name = fields[0]
+        self.type = fields[1]
+        self.leader = "leader" in fields
+        self.position = character_coords_from_strat(self.text)
+
+    def to_text(self):
+        """
+        Writes the Character entry back out, with its current position
+
+        :return: descr_strat text of the character
+        """
+        x, y = self.position
+        return POSITION.sub(lambda m: m.group(1) + str(x) + m.group(3) + str(y), self.text, count=1)
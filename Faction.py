@@ -1,7 +1,13 @@
+import re
+
 import Character
 import Settlement
 from text_extraction import faction_name_from_strat
 
+DETAILS = re.compile(r"\bsettlement|\bcharacter\s")
+MONEY = re.compile(r"(\bdenari\s+)([0-9]+)")
+PURSE = re.compile(r"(\bdenari_kings_purse\s+)([0-9]+)")
+
 
 class Faction:
     """
@@ -9,6 +15,9 @@ class Faction:
     campaign details.
 
     """
+    __slots__ = ("name", "cult", "start_money", "kings_purse", "settlements", "characters", "header", "family",
+                 "text")
+
     def __init__(self, text):
         self.name = ""
         self.cult = ""
@@ -16,6 +25,8 @@ class Faction:
         self.kings_purse = 0
         self.settlements = []  # First settlement is always capital
         self.characters = []  # First character SHOULD always be faction leader
+        self.header = ""  # Faction details before the first settlement/character (ai label, denari, etc)
+        self.family = ""  # Family tree (character_record entries)
         self.text = text
 
     def parse_text(self):
@@ -24,4 +35,40 @@ class Faction:
 
         :return:
         """
-        return None
+        self.name = faction_name_from_strat(self.text)
+
+        # Split into the faction details, then a chunk per settlement/character
+        bounds = [m.start() for m in DETAILS.finditer(self.text)] + [len(self.text)]
+        self.header = self.text[:bounds[0]]
+        chunks = [self.text[start:end] for start, end in zip(bounds, bounds[1:])]
+
+        if chunks:  # Save info on family relationships; not all factions have family trees
+            last, record, family = chunks[-1].partition("character_record")
+            chunks[-1] = last
+            self.family = record + family
+
+        money = MONEY.search(self.header)
+        purse = PURSE.search(self.header)
+        self.start_money = int(money.group(2)) if money else 0
+        self.kings_purse = int(purse.group(2)) if purse else 0
+
+        for chunk in chunks:
+            if chunk.startswith("settlement"):
+                entry = Settlement.Settlement(chunk)
+                self.settlements.append(entry)
+            else:
+                entry = Character.Character(chunk)
+                self.characters.append(entry)
+            entry.parse_text()
+
+    def to_text(self):
+        """
+        Writes the Faction entry back out, with its current funds, settlements & characters
+
+        :return: descr_strat text of the faction
+        """
+        header = MONEY.sub(lambda m: m.group(1) + str(self.start_money), self.header, count=1)
+        header = PURSE.sub(lambda m: m.group(1) + str(self.kings_purse), header, count=1)
+        text_sett = "".join(s.to_text() for s in self.settlements)
+        text_char = "".join(ch.to_text() for ch in self.characters)
+        return header + text_sett + text_char + self.family
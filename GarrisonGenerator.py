@@ -1,7 +1,52 @@
 import os
 import re
-from numpy import random as rand
-rand.seed(1)
+import numpy as np
+
+# Unit ranks, as indexes into each faction's template
+STANDARD = 0
+UNCOMMON = 1
+RARE = 2
+GENERAL = 3
+
+
+class GarrisonBatch:
+    """
+    Compact, array-backed set of garrisons produced by GarrisonGenerator.generate_many.
+    Units are stored as codes into a shared table of unit entries, with the units of each garrison held contiguously
+    (general, then rares, uncommons & standards, each sorted) in the same order as generate_garrisons.
+
+    """
+    __slots__ = ("table", "units", "ranks", "offsets", "spent")
+
+    def __init__(self, table, units, ranks, offsets, spent):
+        self.table = table  # unit entries, indexed by the codes in units
+        self.units = units  # unit codes of every garrison, concatenated
+        self.ranks = ranks  # rank of each unit (STANDARD, UNCOMMON, RARE, GENERAL)
+        self.offsets = offsets  # garrison i's units are units[offsets[i]:offsets[i+1]]
+        self.spent = spent  # points spent on each garrison
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def garrison(self, i):
+        """
+        Retrieves the units of a single garrison
+
+        :param i: index of the garrison, matching the order of the requests
+        :return: array of units to add to the garrison
+        """
+        return [self.table[u] for u in self.units[self.offsets[i]:self.offsets[i+1]]]
+
+    def rank_counts(self):
+        """
+        Counts the units of each rank in every garrison
+
+        :return: int array of shape (garrisons, 4), indexed by rank
+        """
+        garrisons = np.repeat(np.arange(len(self)), np.diff(self.offsets))
+        counts = np.zeros((len(self), 4), dtype=np.int64)
+        np.add.at(counts, (garrisons, self.ranks), 1)
+        return counts
 
 
 class GarrisonGenerator:
@@ -18,29 +63,29 @@ class GarrisonGenerator:
         """
         filepath = "defaults/armies/"
         templates = os.listdir(filepath)
-        factions = []
+        self.templates = {}
         for file in templates:
-            army = open(filepath + file)
-            army = army.read()
+            with open(filepath + file) as f:
+                army = f.read()
             army = re.split(r"#[A-Z]+\n", army)
             units = []
             for rank in army[1:]:
                 rank_units = re.split(r"\n", rank)
                 rank_units = rank_units[:-1] if len(rank_units) > 1 else rank_units
                 units.append(rank_units)
-            factions.append(units)
-        self.facnames = [t.replace(".txt", "") for t in templates]
-        self.templates = factions
+            self.templates[file.replace(".txt", "")] = units
 
-    def generate_garrisons(self, fac, tier):
+    def generate_garrisons(self, fac, tier, rng=None):
         """
         Generates a garrison given the provided statistics, faction, and settlement rank
 
         :param fac: faction to generate for
         :param tier: level of the assigned settlement
+        :param rng: seed or numpy Generator to draw from, so each garrison can have a stream of its own
         :return: array of units to add to the garrison
         """
-        allowed = self.templates[self.facnames.index(fac)]  # allowed units
+        rand = np.random.default_rng(rng)
+        allowed = self.templates[fac]  # allowed units
         tier_num = self.CITY_TIERS.index(tier)  # tier converted to a numerical representation
 
         points = self.pts_def + (self.pts_per * tier_num)
@@ -77,7 +122,7 @@ class GarrisonGenerator:
         unc = []
         strikes = 2
         while not points < self.costs[1]:
-            if rand.random() < self.prob_rare[tier_num] and strikes > 0:
+            if rand.random() < self.prob_uncommon[tier_num] and strikes > 0:
                 unc.append(rand.choice(allowed[1], 1)[0])
                 points -= self.costs[1]
             elif strikes == 0:
@@ -96,6 +141,83 @@ class GarrisonGenerator:
         # Append & return
         return garrison
 
+    def generate_many(self, requests, seed=None):
+        """
+        Generates many garrisons at once, drawing all random numbers in bulk.
+        Follows the same rules as generate_garrisons, and is reproducible for a given seed.
+
+        :param requests: list of (faction, settlement level) pairs to generate a garrison for
+        :param seed: seed or numpy Generator to draw from
+        :return: GarrisonBatch holding the garrisons, in the order of requests
+        """
+        rng = np.random.default_rng(seed)
+        table, base, size = self.__unit_table__()
+        fac_nums = {fac: i for i, fac in enumerate(self.templates)}
+        tier_nums = {tier: i for i, tier in enumerate(self.CITY_TIERS)}
+        facs = np.array([fac_nums[fac] for fac, _ in requests], dtype=np.int64)
+        tiers = np.array([tier_nums[tier] for _, tier in requests], dtype=np.int64)
+        count = len(requests)
+
+        points = self.pts_def + self.pts_per * tiers
+        generals = (rng.random(count) < np.asarray(self.prob_gen)[tiers]).astype(np.int64)
+        points -= generals * self.costs[1]  # use same cost as an Uncommon
+        rares = self.__strike_counts__(rng, np.asarray(self.prob_rare)[tiers], points // self.costs[2])
+        points -= rares * self.costs[2]
+        uncommons = self.__strike_counts__(rng, np.asarray(self.prob_uncommon)[tiers], points // self.costs[1])
+        points -= uncommons * self.costs[1]
+        standards = np.maximum(points, 0) // self.costs[0]
+
+        # Lay out one slot per unit: garrison by garrison, in the order general, rares, uncommons, standards
+        per_rank = np.stack([generals, rares, uncommons, standards], axis=1)
+        slot_ranks = np.tile([GENERAL, RARE, UNCOMMON, STANDARD], count)
+        slot_garrisons = np.repeat(np.arange(count), 4)
+        ranks = np.repeat(slot_ranks, per_rank.ravel())
+        garrisons = np.repeat(slot_garrisons, per_rank.ravel())
+
+        options = size[facs[garrisons], ranks]
+        if np.any(options == 0):
+            raise ValueError("Faction template is missing units for a rank it needs to generate")
+        units = base[facs[garrisons], ranks] + (rng.random(len(ranks)) * options).astype(np.int64)
+
+        # Sort units within each rank of each garrison; table codes within a rank are in sorted order
+        order = np.lexsort((units, GENERAL - ranks, garrisons))
+        offsets = np.concatenate([[0], np.cumsum(per_rank.sum(axis=1))])
+        spent = per_rank @ np.array([self.costs[1], self.costs[2], self.costs[1], self.costs[0]])
+        return GarrisonBatch(table, units[order], ranks[order].astype(np.int8), offsets, spent)
+
+    def __unit_table__(self):
+        """
+        Flattens the templates into one sorted table of unit entries
+
+        :return: list of unit entries, (faction, rank) -> first code array, (faction, rank) -> number of units array
+        """
+        table = []
+        base = np.zeros((len(self.templates), 4), dtype=np.int64)
+        size = np.zeros((len(self.templates), 4), dtype=np.int64)
+        for f, ranks in enumerate(self.templates.values()):
+            for r, rank_units in enumerate(ranks[:4]):
+                base[f, r] = len(table)
+                size[f, r] = len(rank_units)
+                table.extend(sorted(rank_units))
+        return table, base, size
+
+    @staticmethod
+    def __strike_counts__(rng, prob, affordable):
+        """
+        Counts the units added under the 2-strike rule: units are added while draws succeed, until a second draw fails
+        or no more units are affordable.
+
+        :param rng: numpy Generator to draw from
+        :param prob: probability of each draw succeeding, per garrison
+        :param affordable: max number of units which can be paid for, per garrison
+        :return: int array containing the number of units added to each garrison
+        """
+        affordable = np.maximum(affordable, 0)
+        draws = int(affordable.max(initial=0)) + 2
+        hits = rng.random((len(prob), draws)) < prob[:, None]
+        alive = np.cumsum(~hits, axis=1) < 2  # draws before the second strike
+        return np.minimum(np.sum(hits & alive, axis=1), affordable)
+
     def __init__(self):
         self.pts_def = 5  # starting capacity at villages
         self.pts_per = 3  # additional points per settlement level
@@ -103,6 +225,5 @@ class GarrisonGenerator:
         self.prob_uncommon = [0.25, 0.4, 0.55, 0.75, 0.775, 0.825]  # for village, town, large town, city, large city, huge city
         self.prob_rare = [0.125, 0.25, 0.375, 0.55, 0.75, 0.8]
         self.prob_gen = [0.2, 0.4, 0.6, 0.8, 0.9, 1.0]
-        self.facnames = []  # loaded in __load_templates_()
-        self.templates = []
+        self.templates = {}  # faction -> units of each rank, loaded in __load_templates_()
         self.CITY_TIERS = ['village', 'town', 'large_town', 'city', 'large_city', 'huge_city']
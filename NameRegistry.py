@@ -0,0 +1,56 @@
+import re
+
+CHARACTER_NAMES = re.compile(r"faction:\s*([a-z_]+)\s+characters\s+(.*?)\bwomen\b", re.IGNORECASE | re.DOTALL)
+RECORD_NAMES = re.compile(r"character_record\s+([^,\s]+),")
+
+
+class NameRegistry:
+    """
+    Holds the pool of male character names for each faction from descr_names, loaded once.
+    Names are removed from a faction's free pool as characters are generated, so no two characters share a name.
+
+    """
+    def take(self, fac, rng):
+        """
+        Picks a random free name for a faction and removes it from the faction's free names.
+        The picked name is swapped with the last free name & popped, so taking a name doesn't depend on the pool size.
+
+        :param fac: Faction to name a character for
+        :param rng: numpy Generator to draw from
+        :return: the chosen name
+        """
+        free = self.free_names(fac)
+        if not free:
+            raise ValueError("No free character names left for " + fac.name + " in descr_names")
+        i = int(rng.integers(len(free)))
+        name = free[i]
+        free[i] = free[-1]
+        free.pop()
+        return name
+
+    def reset(self):
+        """
+        Forgets which names have been taken, ready for a new scenario
+
+        :return:
+        """
+        self.free = {}
+
+    def free_names(self, fac):
+        """
+        Retrieves the names still free in a faction, leaving out those of its characters & family tree the first time
+
+        :param fac: Faction to retrieve names for
+        :return: list of free names
+        """
+        if fac.name not in self.free:
+            used = {ch.name for ch in fac.characters}
+            used.update(RECORD_NAMES.findall(fac.family))
+            self.free[fac.name] = [n for n in dict.fromkeys(self.names.get(fac.name, ())) if n not in used]
+        return self.free[fac.name]
+
+    def __init__(self, text):
+        self.names = {}  # faction -> character names, in file order
+        self.free = {}  # faction -> names not yet taken, see free_names
+        for match in CHARACTER_NAMES.finditer(text):
+            self.names[match.group(1)] = match.group(2).split()
@@ -0,0 +1,70 @@
+import json
+import time
+from contextlib import contextmanager
+
+
+class Profiler:
+    """
+    Collects wall-clock timings for each stage of the generation pipeline along with hot-path counters
+    (tiles checked, characters parsed, etc), and reports them as JSON.
+
+    """
+    @contextmanager
+    def stage(self, name):
+        """
+        Times a block of the pipeline, adding to the stage's total if it runs more than once
+
+        :param name: name of the stage
+        :return:
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            calls, total = self.stages.get(name, (0, 0.0))
+            self.stages[name] = (calls+1, total+time.perf_counter()-start)
+
+    def count(self, name, n=1):
+        """
+        Adds to a counter
+
+        :param name: name of the counter
+        :param n: amount to add
+        :return:
+        """
+        self.counters[name] = self.counters.get(name, 0)+n
+
+    def reset(self):
+        """
+        Clears all timings & counters, ready for a new run
+
+        :return:
+        """
+        self.stages = {}  # stage -> (calls, total seconds)
+        self.counters = {}  # counter -> count
+
+    def report(self):
+        """
+        Summarises the timings & counters
+
+        :return: dict of stages (calls, seconds), counters & the total time over all stages
+        """
+        return {
+            "stages": {name: {"calls": calls, "time": round(total, 6)} for name, (calls, total) in self.stages.items()},
+            "counters": dict(self.counters),
+            "total": round(sum(total for _, total in self.stages.values()), 6),
+        }
+
+    def write_json(self, filename):
+        """
+        Writes the report to a JSON file
+
+        :param filename: path of the file
+        :return:
+        """
+        with open(filename, "w") as f:
+            json.dump(self.report(), f, indent=1)
+
+    def __init__(self):
+        self.stages = {}  # stage -> (calls, total seconds)
+        self.counters = {}  # counter -> count
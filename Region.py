@@ -0,0 +1,46 @@
+import re
+
+COLOUR = re.compile(r"^\s+([0-9]+)\s+([0-9]+)\s+([0-9]+)\s*$", re.MULTILINE)
+RELIGIONS = re.compile(r"religions\s*{([^}]*)}")
+
+
+class Region:
+    """
+    Represents a province entry of descr_regions, including the region colour on map_regions, the starting religions
+    and where the entry sits in the original file.
+
+    """
+    __slots__ = ("name", "colour", "religions", "strengths", "span", "text")
+
+    def __init__(self, text, span=(0, 0)):
+        self.name = ""
+        self.colour = (0, 0, 0)
+        self.religions = []  # Religion names, in file order
+        self.strengths = []  # Matching religion strengths
+        self.span = span  # Start & end of the entry in descr_regions
+        self.text = text
+
+    def parse_text(self):
+        """
+        Parses the raw text of the Region entry
+
+        :return:
+        """
+        self.name = self.text.split(None, 1)[0]
+        r, g, b = COLOUR.search(self.text).groups()
+        self.colour = (int(r), int(g), int(b))
+        cults = RELIGIONS.search(self.text).group(1).split()
+        self.religions = cults[0::2]
+        self.strengths = [int(s) for s in cults[1::2]]
+
+    def to_text(self, strengths=None):
+        """
+        Writes the Region entry back out, optionally with new religion strengths
+
+        :param strengths: new strengths for each of the region's religions, or None to keep the originals
+        :return: descr_regions text of the region
+        """
+        if strengths is None:
+            return self.text
+        cults = " ".join(rel + " " + str(s) for rel, s in zip(self.religions, strengths))
+        return RELIGIONS.sub(lambda m: "religions { " + cults + " }", self.text, count=1)
@@ -0,0 +1,48 @@
+from collections import deque
+
+from map_extraction import pack_colour
+
+
+class RegionGraph:
+    """
+    Which provinces border each other on map_regions, for neighbourhood queries (neighbours of a capital, rebel
+    settlements within k hops, etc) without rescanning the map.
+
+    """
+    def neighbours(self, name):
+        """
+        Retrieves the provinces bordering a province
+
+        :param name: province name
+        :return: sorted list of province names
+        """
+        return sorted(self.edges.get(name, ()))
+
+    def within(self, name, hops):
+        """
+        Finds every province within some number of borders of a province, by breadth-first search
+
+        :param name: province name
+        :param hops: max number of borders to cross
+        :return: dict of province name -> number of borders crossed (0 for the province itself)
+        """
+        dist = {name: 0}
+        queue = deque([name])
+        while queue:
+            current = queue.popleft()
+            if dist[current] == hops:
+                continue
+            for nxt in self.edges.get(current, ()):
+                if nxt not in dist:
+                    dist[nxt] = dist[current]+1
+                    queue.append(nxt)
+        return dist
+
+    def __init__(self, regions, pairs):
+        self.edges = {name: set() for name in regions}  # province name -> names of the bordering provinces
+        names = {pack_colour(region.colour): name for name, region in regions.items()}
+        for a, b in pairs:
+            a, b = names.get(int(a)), names.get(int(b))
+            if a and b:  # settlements, ports & sea aren't provinces
+                self.edges[a].add(b)
+                self.edges[b].add(a)
@@ -0,0 +1,89 @@
+import copy
+
+import numpy as np
+
+
+class ReligionMatrix:
+    """
+    Religion strengths of every region held in one region x religion array, so culture changes for any number of
+    regions (capitals, their neighbours, or the whole map) are applied as batched array operations.
+    Each region keeps its own total strength (normally 100) through normalise.
+
+    """
+    def copy(self):
+        """
+        Takes an independent copy to make a scenario's changes in
+
+        :return: ReligionMatrix
+        """
+        other = copy.copy(self)
+        other.strengths = self.strengths.copy()
+        return other
+
+    def convert(self, regions, religions, amounts, skip_unlisted=False):
+        """
+        Converts some strength in each region from its strongest religion to another religion
+
+        :param regions: province names, one per conversion (a province may appear more than once)
+        :param religions: religion gaining strength in each conversion
+        :param amounts: strength to move in each conversion, a single value or one per conversion
+        :param skip_unlisted: leave out conversions to a religion the region's entry doesn't list, rather than raising
+        :return: indexes of the rows changed
+        """
+        rows = np.array([self.rows[name] for name in regions], dtype=np.int64)
+        cols = np.array([self.columns.get(rel, -1) for rel in religions], dtype=np.int64)
+        amounts = np.broadcast_to(np.asarray(amounts, dtype=np.float64), rows.shape)
+        listed = (cols >= 0) & self.listed[rows, np.maximum(cols, 0)]
+        if skip_unlisted:
+            rows, cols, amounts = rows[listed], cols[listed], amounts[listed]
+        elif not listed.all():
+            missing = np.flatnonzero(~listed)[0]
+            raise ValueError(religions[missing] + " isn't one of the religions of " + regions[missing])
+
+        strongest = np.argmax(np.where(self.listed[rows], self.strengths[rows], -np.inf), axis=1)
+        np.add.at(self.strengths, (rows, strongest), -amounts)
+        np.add.at(self.strengths, (rows, cols), amounts)
+        return np.unique(rows)
+
+    def normalise(self, rows):
+        """
+        Clips negative strengths & rescales regions back to their original totals, rounding to whole numbers while
+        keeping each total exact (largest remainder)
+
+        :param rows: indexes of the rows to normalise
+        :return:
+        """
+        values = np.maximum(self.strengths[rows], 0)
+        sums = values.sum(axis=1, keepdims=True)
+        values = np.divide(values * self.totals[rows, None], sums, out=values, where=sums > 0)
+
+        whole = np.floor(values)
+        short = np.where(sums[:, 0] > 0, self.totals[rows] - whole.sum(axis=1), 0).astype(np.int64)
+        ranks = np.argsort(np.argsort(whole - values + ~self.listed[rows], axis=1, kind="stable"), axis=1)
+        whole += ranks < short[:, None]
+        self.strengths[rows] = whole
+
+    def changes(self, rows):
+        """
+        Reads back the new strengths of some regions, in each region's own religion order
+
+        :param rows: indexes of the rows to read
+        :return: dict of province name -> list of strengths, see regions_chunks
+        """
+        return {self.names[r]: [int(self.strengths[r, self.columns[rel]]) for rel in self.religions_of[self.names[r]]]
+                for r in rows}
+
+    def __init__(self, regions):
+        self.names = list(regions)  # province name of each row
+        self.rows = {name: i for i, name in enumerate(self.names)}
+        self.religions_of = {name: region.religions for name, region in regions.items()}
+        self.religions = list(dict.fromkeys(rel for region in regions.values() for rel in region.religions))
+        self.columns = {rel: i for i, rel in enumerate(self.religions)}
+
+        self.strengths = np.zeros((len(self.names), len(self.religions)), dtype=np.float64)
+        self.listed = np.zeros(self.strengths.shape, dtype=bool)  # which religions each region's entry names
+        for i, region in enumerate(regions.values()):
+            cols = [self.columns[rel] for rel in region.religions]
+            self.strengths[i, cols] = region.strengths
+            self.listed[i, cols] = True
+        self.totals = self.strengths.sum(axis=1)
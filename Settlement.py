@@ -1,3 +1,5 @@
+from text_extraction import settlement_name_from_strat, settlement_tier_from_strat
+
 
 class Settlement:
     """
@@ -5,9 +7,12 @@ class Settlement:
     cultures & name.
 
     """
+    __slots__ = ("colour", "name", "tier", "settlement_location", "cultures", "text")
+
     def __init__(self, text):
         self.colour = (0, 0, 0)
         self.name = ""
+        self.tier = ""
         self.settlement_location = (0, 0)
         self.cultures = ""
         self.text = text
@@ -18,4 +23,13 @@ class Settlement:
 
         :return:
         """
-        return None
+        self.name = settlement_name_from_strat(self.text)
+        self.tier = settlement_tier_from_strat(self.text)
+
+    def to_text(self):
+        """
+        Writes the Settlement entry back out
+
+        :return: descr_strat text of the settlement
+        """
+        return self.text
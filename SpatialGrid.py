@@ -0,0 +1,37 @@
+import numpy as np
+
+
+class SpatialGrid:
+    """
+    Uniform grid over a set of map points (settlements, capitals, etc) for fast radius queries.
+    Each point is bucketed by the cell it falls in, so a query only measures the points of the few cells around it
+    rather than every point on the map.
+
+    """
+    def query_radius(self, point, radius):
+        """
+        Finds every point within some distance of a position
+
+        :param point: X, Y of the position
+        :param radius: max (euclidean) distance in tiles
+        :return: int array of the indexes of the points in range
+        """
+        reach = int(np.ceil(radius / self.cell))
+        cx, cy = int(point[0] // self.cell), int(point[1] // self.cell)
+        near = [self.buckets[(x, y)] for x in range(cx-reach, cx+reach+1) for y in range(cy-reach, cy+reach+1)
+                if (x, y) in self.buckets]
+        if not near:
+            return np.zeros(0, dtype=np.int64)
+        near = np.concatenate(near)
+        dist = np.hypot(*(self.points[near] - np.asarray(point, dtype=np.float64)).T)
+        return near[dist < radius]
+
+    def __init__(self, points, cell):
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 2)  # X, Y of each point
+        self.cell = max(float(cell), 1.0)  # width & height of each cell in tiles
+        self.buckets = {}  # (cell x, cell y) -> indexes of the points in the cell
+        cells = (self.points // self.cell).astype(np.int64)
+        order = np.lexsort((cells[:, 1], cells[:, 0]))
+        keys, starts = np.unique(cells[order], axis=0, return_index=True)
+        for key, group in zip(keys, np.split(order, starts[1:])):
+            self.buckets[(int(key[0]), int(key[1]))] = group
@@ -0,0 +1,128 @@
+# Monte Carlo balance simulation for GarrisonGenerator: runs many seeded garrison generations per faction & tier
+# (optionally across a grid of generator settings) and reports the resulting distributions.
+#
+# Usage: python balance_sim.py --runs 1000 --grid '{"pts_def": [4, 5, 6], "pts_per": [2, 3]}' --out balance
+import argparse
+import csv
+import itertools
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from GarrisonGenerator import GarrisonGenerator, STANDARD, UNCOMMON, RARE, GENERAL
+
+PARAMS = ["pts_def", "pts_per", "costs", "prob_uncommon", "prob_rare", "prob_gen"]  # settings which can be swept
+
+
+def param_grid(grid):
+    """
+    Expands a grid of generator settings into every combination of them
+
+    :param grid: dict of setting name -> list of values to try
+    :return: list of dicts, one per combination of settings
+    """
+    for name in grid:
+        if name not in PARAMS:
+            raise ValueError("Unknown generator setting: " + name)
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*[grid[n] for n in names])]
+
+
+def simulate(params, fac, runs, seed):
+    """
+    Generates garrisons for every settlement level of one faction with the given settings and summarises them.
+    Runs in a worker process.
+
+    :param params: dict of generator settings to override
+    :param fac: faction to generate for
+    :param runs: number of garrisons to generate per settlement level
+    :param seed: seed (or SeedSequence) for this faction's draws
+    :return: list of result rows, one per settlement level
+    """
+    gen = GarrisonGenerator()
+    gen.__load_templates__()
+    for name, value in params.items():
+        setattr(gen, name, value)
+
+    requests = [(fac, tier) for tier in gen.CITY_TIERS for _ in range(runs)]
+    batch = gen.generate_many(requests, np.random.default_rng(seed))
+    counts = batch.rank_counts().reshape(len(gen.CITY_TIERS), runs, 4)
+    spent = batch.spent.reshape(len(gen.CITY_TIERS), runs)
+    units = counts.sum(axis=2)
+
+    rows = []
+    for t, tier in enumerate(gen.CITY_TIERS):
+        rows.append({
+            "params": json.dumps(params, sort_keys=True),
+            "faction": fac,
+            "tier": tier,
+            "runs": runs,
+            "general_freq": float(counts[t, :, GENERAL].mean()),
+            "rare_mean": float(counts[t, :, RARE].mean()),
+            "uncommon_mean": float(counts[t, :, UNCOMMON].mean()),
+            "standard_mean": float(counts[t, :, STANDARD].mean()),
+            "units_mean": float(units[t].mean()),
+            "units_p10": float(np.percentile(units[t], 10)),
+            "units_p90": float(np.percentile(units[t], 90)),
+            "spent_mean": float(spent[t].mean()),
+            "spent_min": int(spent[t].min()),
+            "spent_max": int(spent[t].max()),
+        })
+    return rows
+
+
+def run(grid, runs, seed, workers, factions=None):
+    """
+    Simulates every faction under every combination of settings, spread across a process pool.
+    Each (settings, faction) task gets its own seed spawned from the root seed, so results don't depend on scheduling.
+
+    :param grid: dict of setting name -> list of values to try
+    :param runs: number of garrisons to generate per faction & settlement level
+    :param seed: root seed
+    :param workers: number of worker processes
+    :param factions: factions to simulate, or None for every faction with a template
+    :return: list of result rows
+    """
+    if factions is None:
+        gen = GarrisonGenerator()
+        gen.__load_templates__()
+        factions = sorted(gen.templates)
+
+    tasks = [(params, fac) for params in param_grid(grid) for fac in factions]
+    seeds = np.random.SeedSequence(seed).spawn(len(tasks))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(simulate, params, fac, runs, s) for (params, fac), s in zip(tasks, seeds)]
+        return [row for future in futures for row in future.result()]
+
+
+def write_results(rows, out):
+    """
+    Writes the result rows to <out>.csv & <out>.json
+
+    :param rows: result rows, see simulate
+    :param out: output path, without extension
+    :return:
+    """
+    with open(out + ".json", "w") as f:
+        json.dump(rows, f, indent=1)
+    with open(out + ".csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else [])
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monte Carlo balance simulation of generated garrisons")
+    parser.add_argument("--runs", type=int, default=1000, help="garrisons per faction & settlement level")
+    parser.add_argument("--seed", type=int, default=1, help="root seed")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--grid", default="{}", help="JSON dict of setting -> list of values to sweep")
+    parser.add_argument("--factions", nargs="*", default=None, help="factions to simulate (default: all)")
+    parser.add_argument("--out", default="balance", help="output path, without extension")
+    args = parser.parse_args()
+
+    start = time.time()
+    results = run(json.loads(args.grid), args.runs, args.seed, args.workers, args.factions)
+    write_results(results, args.out)
+    print("SIMULATED", len(results), "ROWS IN", round(time.time()-start, 2), "s")
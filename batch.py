@@ -0,0 +1,123 @@
+# Generates a scenario for each of a list of seeds across a process pool, loading & parsing the campaign only once per
+# worker. Each scenario is written to its own directory, and a manifest links each seed to its output.
+# With --validate each scenario is checked straight after it's generated, and the directories of invalid ones removed.
+# Seeds whose generation fails are recorded as invalid in the manifest rather than stopping the batch.
+#
+# Usage: python batch.py --seeds 1 2 3 --out seeds
+#        python batch.py --first 100 --count 50 --workers 8 --out seeds
+#        python batch.py --count 500 --gzip --out seed_pack
+#        python batch.py --count 500 --validate --out seeds
+import argparse
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from CampaignGenerator import CampaignGenerator, SCENARIO_RECORD
+
+Generator = CampaignGenerator()  # loads & parses the campaign files once per process, on first use
+
+
+def run_seed(seed, out_root, compress=False, validate=False):
+    """
+    Generates the scenario for one seed. Runs in a worker process.
+
+    :param seed: scenario seed
+    :param out_root: directory holding every scenario's output directory
+    :param compress: gzip the scenario's files
+    :param validate: check the scenario, removing its directory if it's invalid
+    :return: manifest entry for the scenario
+    """
+    start = time.time()
+    out_dir = os.path.join(out_root, "seed_" + str(seed))
+    os.makedirs(out_dir, exist_ok=True)
+    try:
+        Generator.generate(seed, out_dir, compress)
+    except Exception as e:  # ie. a character which can't be placed; the seed is bad, the rest of the batch isn't
+        shutil.rmtree(out_dir, ignore_errors=True)
+        return failed_entry(seed, e, time.time()-start)
+    suffix = ".gz" if compress else ""
+    entry = {
+        "seed": seed,
+        "dir": os.path.relpath(out_dir, out_root),
+        "files": ["descr_strat.txt" + suffix, "descr_regions.txt" + suffix, SCENARIO_RECORD],
+    }
+    if validate:
+        report = Generator.validate(out_dir)
+        entry["valid"] = report["valid"]
+        entry["errors"] = report["errors"]
+        if not report["valid"]:
+            shutil.rmtree(out_dir)
+            entry["dir"], entry["files"] = None, []
+    entry["time"] = round(time.time()-start, 3)
+    return entry
+
+
+def failed_entry(seed, error, seconds=0.0):
+    """
+    Describes a seed whose generation failed
+
+    :param seed: scenario seed
+    :param error: exception raised while generating
+    :param seconds: time spent before the failure
+    :return: manifest entry for the seed
+    """
+    return {
+        "seed": seed,
+        "dir": None,
+        "files": [],
+        "valid": False,
+        "errors": [{"check": "generation_failed", "error": type(error).__name__ + ": " + str(error)}],
+        "time": round(seconds, 3),
+    }
+
+
+def run(seeds, out_root, workers=None, compress=False, validate=False):
+    """
+    Generates a scenario for every seed in parallel & writes the manifest
+
+    :param seeds: list of seeds
+    :param out_root: directory to write the scenarios & manifest to
+    :param workers: number of worker processes (default: CPU count)
+    :param compress: gzip each scenario's files
+    :param validate: check each scenario, rejecting invalid seeds
+    :return: manifest entries, in the order of seeds
+    """
+    os.makedirs(out_root, exist_ok=True)
+    entries = [None] * len(seeds)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_seed, seed, out_root, compress, validate): i for i, seed in enumerate(seeds)}
+        for future in as_completed(futures):  # collected one by one, so a failure can't lose the other seeds
+            i = futures[future]
+            try:
+                entries[i] = future.result()
+            except Exception as e:  # the worker itself died
+                shutil.rmtree(os.path.join(out_root, "seed_" + str(seeds[i])), ignore_errors=True)
+                entries[i] = failed_entry(seeds[i], e)
+
+    with open(os.path.join(out_root, "manifest.json"), "w") as f:
+        json.dump(entries, f, indent=1)
+    return entries
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a scenario for each of a list of seeds")
+    parser.add_argument("--seeds", type=int, nargs="*", default=None, help="seeds to generate")
+    parser.add_argument("--first", type=int, default=0, help="first seed, if --seeds isn't given")
+    parser.add_argument("--count", type=int, default=10, help="number of seeds, if --seeds isn't given")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--out", default="seeds", help="output directory")
+    parser.add_argument("--gzip", action="store_true", help="gzip each scenario's files")
+    parser.add_argument("--validate", action="store_true", help="check each scenario & reject invalid seeds")
+    args = parser.parse_args()
+
+    seeds = args.seeds if args.seeds is not None else list(range(args.first, args.first + args.count))
+    start = time.time()
+    entries = run(seeds, args.out, args.workers, args.gzip, args.validate)
+    print("GENERATED", len(seeds), "SCENARIOS IN", round(time.time()-start, 2), "s")
+    failed = sum(1 for e in entries if e["dir"] is None)
+    if args.validate:
+        print("REJECTED", sum(not e["valid"] for e in entries), "INVALID SEEDS")
+    elif failed:
+        print("FAILED", failed, "SEEDS, SEE THE MANIFEST")
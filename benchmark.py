@@ -0,0 +1,163 @@
+# Benchmarks the generation pipeline on synthetic campaigns of increasing size (see synthetic_campaign), timing each
+# stage along with the hot spots (settlement lookups, tile checks & garrisons), and records the results so they can be
+# compared against an earlier run to catch regressions.
+#
+# Usage: python benchmark.py --sizes small medium large --repeats 5 --out bench.json
+#        python benchmark.py --compare bench.json --threshold 0.25
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+from CampaignGenerator import CampaignGenerator
+from map_extraction import find_settlement_coords
+from synthetic_campaign import write_campaign
+
+SIZES = {
+    "small": {"factions": 8, "settlements": 3, "rebels": 20, "characters": 4, "size": (256, 256)},
+    "medium": {"factions": 24, "settlements": 4, "rebels": 80, "characters": 6, "size": (512, 512)},
+    "large": {"factions": 48, "settlements": 6, "rebels": 250, "characters": 8, "size": (1024, 1024)},
+    "huge": {"factions": 64, "settlements": 8, "rebels": 500, "characters": 12, "size": (2048, 2048)},
+}
+LOOKUPS = 10000  # tiles checked with tile_is_valid per repeat
+
+
+def timed(func, *args):
+    """
+    Times a single call
+
+    :param func: function to call
+    :param args: arguments of the call
+    :return: seconds taken
+    """
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter()-start
+
+
+def hot_spots(gen, rng):
+    """
+    Times the hot spots of the pipeline on the loaded campaign
+
+    :param gen: CampaignGenerator which has generated at least once
+    :param rng: numpy Generator for the tiles to check
+    :return: dict of hot spot -> seconds
+    """
+    colours = [s.colour for fac in gen.factions for s in fac.settlements]
+    index = gen.settlement_coords[0]
+    tiles = rng.integers(0, gen.placeable.shape, (LOOKUPS, 2))
+    occupied = np.zeros(gen.placeable.shape, dtype=np.int32)
+    requests = [(gen.factions[i].name, s.tier)
+                for i, settles in enumerate(gen.orig_settlements) for s in settles]
+
+    def lookups():
+        for colour in colours:
+            find_settlement_coords(colour, index)
+
+    def checks():
+        for x, y in tiles:
+            gen.tile_is_valid(x, y, occupied)
+
+    def garrisons():
+        for fac, tier in requests:
+            gen.garrisons.generate_garrisons(fac, tier, rng)
+
+    return {
+        "find_settlement_coords": timed(lookups),
+        "tile_is_valid": timed(checks),
+        "generate_garrisons": timed(garrisons),
+        "generate_many": timed(gen.garrisons.generate_many, requests, 0),
+    }
+
+
+def run_size(name, params, repeats, seed):
+    """
+    Builds a synthetic campaign & generates it repeatedly, collecting stage & hot spot timings
+
+    :param name: name of the size, for reporting
+    :param params: synthetic campaign settings, see write_campaign
+    :param repeats: number of generations
+    :param seed: seed of the first generation
+    :return: dict of the campaign's settings & the fastest/median time of each stage & hot spot
+    """
+    directory = tempfile.mkdtemp(prefix="dyndac_bench_" + name + "_")
+    cwd = os.getcwd()
+    try:
+        regions = write_campaign(directory, **params)
+        os.chdir(directory)  # the generator reads names, cultures & templates from the working directory
+        gen = CampaignGenerator(cache_dir=None)
+        os.makedirs("out")
+        rng = np.random.default_rng(seed)
+        samples = {}
+        for r in range(repeats):
+            gen.generate(seed+r, "out")
+            for stage, (_, total) in gen.profiler.stages.items():
+                samples.setdefault(stage, []).append(total)
+            for spot, total in hot_spots(gen, rng).items():
+                samples.setdefault("hot." + spot, []).append(total)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(directory)
+
+    return {
+        "params": dict(params, size=list(params["size"])),
+        "regions": regions,
+        "timings": {k: {"min": round(min(v), 6), "median": round(statistics.median(v), 6)} for k, v in samples.items()},
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Lists the stages & hot spots which got slower than in a baseline run
+
+    :param results: results of this run, see run_size
+    :param baseline: results of the earlier run
+    :param threshold: allowed slowdown, ie. 0.25 allows 25% slower
+    :return: list of (size, timing, baseline seconds, new seconds)
+    """
+    regressions = []
+    for size, result in results.items():
+        old = baseline.get(size, {}).get("timings", {})
+        for timing, new in result["timings"].items():
+            if timing in old and new["min"] > old[timing]["min"] * (1+threshold):
+                regressions.append((size, timing, old[timing]["min"], new["min"]))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark generation on synthetic campaigns")
+    parser.add_argument("--sizes", nargs="*", default=["small", "medium", "large"], choices=list(SIZES),
+                        help="campaign sizes to run")
+    parser.add_argument("--repeats", type=int, default=3, help="generations per size")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first generation")
+    parser.add_argument("--out", default="bench.json", help="file to record the results in")
+    parser.add_argument("--compare", default=None, help="earlier results to check for regressions against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown against --compare")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["sizes"]
+
+    results = {}
+    for size in args.sizes:
+        results[size] = run_size(size, SIZES[size], args.repeats, args.seed)
+        stages = results[size]["timings"]
+        print(size.upper(), results[size]["regions"], "REGIONS:",
+              ", ".join(k + " " + str(v["min"]) + "s" for k, v in stages.items() if not k.startswith("load.")))
+
+    with open(args.out, "w") as f:
+        json.dump({"python": platform.python_version(), "numpy": np.__version__, "sizes": results}, f, indent=1)
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        for size, timing, old, new in regressions:
+            print("REGRESSION", size, timing, str(old) + "s ->", str(new) + "s")
+        sys.exit(1 if regressions else 0)
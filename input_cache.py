@@ -0,0 +1,95 @@
+# On-disk cache of parsed campaign inputs & precomputed map lookups.
+# Each entry is keyed by a hash of the source files' contents & of the code deriving them, so editing a campaign file or
+# one of the parsers invalidates its entries.
+import glob
+import hashlib
+import os
+import pickle
+
+CACHE_VERSION = 2  # Bump when the parsed structures change shape, so older entries are ignored
+DERIVING_MODULES = ("CampaignGenerator", "Character", "Faction", "GarrisonGenerator", "NameRegistry", "Region",
+                    "RegionGraph", "Settlement", "map_extraction", "regions_parser", "strat_parser",
+                    "text_extraction")  # Modules whose code builds or is pickled into the cached values
+_CODE_DIGEST = None  # see code_digest
+
+
+def file_digest(filenames):
+    """
+    Hashes the contents of a set of files, along with the cache version & the code deriving cached values
+
+    :param filenames: paths of the files
+    :return: hex digest
+    """
+    digest = hashlib.sha256(str(CACHE_VERSION).encode())
+    digest.update(code_digest().encode())
+    for filename in filenames:
+        digest.update(os.path.basename(filename).encode())
+        with open(filename, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def code_digest():
+    """
+    Hashes the source of the modules which derive the cached values (see DERIVING_MODULES), once per process
+
+    :return: hex digest
+    """
+    global _CODE_DIGEST
+    if _CODE_DIGEST is None:
+        here = os.path.dirname(os.path.abspath(__file__))
+        digest = hashlib.sha256()
+        for module in DERIVING_MODULES:
+            with open(os.path.join(here, module + ".py"), "rb") as f:
+                digest.update(module.encode() + b"\0" + f.read())
+        _CODE_DIGEST = digest.hexdigest()
+    return _CODE_DIGEST
+
+
+def cached(cache_dir, name, sources, build):
+    """
+    Retrieves a value from the cache, building & storing it if the cache has no entry for the current sources
+
+    :param cache_dir: directory holding the cache, or None to always build
+    :param name: name of the entry (strat, placeable, etc)
+    :param sources: paths of the files the value is built from
+    :param build: function building the value from the sources
+    :return: the value
+    """
+    if cache_dir is None:
+        return build()
+
+    filename = os.path.join(cache_dir, name + "-" + file_digest(sources)[:16] + ".pkl")
+    if os.path.exists(filename):
+        try:
+            with open(filename, "rb") as f:
+                return pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError, ImportError, IndexError,
+                TypeError):
+            pass  # damaged entry, or one pickled by incompatible code: rebuild it
+
+    value = build()
+    store(filename, value)
+    for stale in glob.glob(os.path.join(cache_dir, name + "-*")):
+        if stale != filename and not stale.endswith(".tmp"):
+            try:
+                os.remove(stale)  # entry for an older version of the sources
+            except FileNotFoundError:
+                pass  # already removed by another process
+    return value
+
+
+def store(filename, value):
+    """
+    Writes a cache entry, via a temporary file so that concurrent readers never see a partial entry
+
+    :param filename: path of the entry
+    :param value: value to store
+    :return:
+    """
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+    tmp = filename + "." + str(os.getpid()) + ".tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, filename)
@@ -0,0 +1,252 @@
+# Contains various map-related functions to extract information from the campaign TGA maps
+import numpy as np
+from PIL import Image, ImageOps
+
+# map_ground_types
+COL_MOUNT = (98, 65, 65)
+COL_IMPASS = (64, 64, 64)
+COL_SHALLOW = (196, 0, 0)
+COL_DEEP = (64, 0, 0)
+COL_DENSE = (0, 64, 0)
+# map_regions
+COL_SEA = (41, 140, 233)
+COL_SETTLE = (0, 0, 0)
+COL_PORT = (255, 255, 255)
+# map_features
+COL_FEATURELESS = (0, 0, 0)
+
+# TGA header fields
+TGA_HEADER = 18
+TGA_TRUE_COLOUR = 2  # uncompressed true-colour; RLE (10) & colour-mapped images are decoded through PIL instead
+TGA_TOP_DOWN = 0x20  # image descriptor bit set when the first stored row is the top of the image
+
+
+def pixel_array(mp):
+    """
+    Extracts the pixel values from the TGA file as an array indexed the same way as pixel_map, ie. [x][y]
+
+    :param mp: the map to extract the values from (already flipped so that y=0 is the bottom row)
+    :return: uint8 array of shape (width, height, 3)
+    """
+    pixels = np.asarray(mp.convert("RGB"), dtype=np.uint8)
+    return pixels.transpose(1, 0, 2)
+
+
+def read_tga(filename):
+    """
+    Reads a TGA map in the same layout as pixel_array, ie. [x][y] with y=0 the bottom row.
+    Uncompressed true-colour files are memory-mapped rather than decoded: the pixels are a view over the file, with the
+    BGR(A) -> RGB swap & any vertical flip done by striding rather than copying. Other TGAs are decoded with PIL.
+
+    :param filename: path to the TGA file
+    :return: uint8 array of shape (width, height, 3)
+    """
+    with open(filename, "rb") as f:
+        header = f.read(TGA_HEADER)
+    id_length, cmap_type, image_type = header[0], header[1], header[2]
+    cmap_length, cmap_bits = int.from_bytes(header[5:7], "little"), header[7]
+    width, height = int.from_bytes(header[12:14], "little"), int.from_bytes(header[14:16], "little")
+    bpp, descriptor = header[16], header[17]
+
+    if image_type != TGA_TRUE_COLOUR or bpp not in (24, 32):
+        return pixel_array(ImageOps.flip(Image.open(filename)))
+
+    offset = TGA_HEADER + id_length + (cmap_length*((cmap_bits+7)//8) if cmap_type else 0)
+    rows = np.memmap(filename, dtype=np.uint8, mode="r", offset=offset, shape=(height, width, bpp//8))
+    if descriptor & TGA_TOP_DOWN:
+        rows = rows[::-1]  # stored top row first, so flip to put the bottom row first
+    return rows[:, :, 2::-1].transpose(1, 0, 2)  # stored as BGR(A)
+
+
+def write_tga(filename, pixels):
+    """
+    Writes pixels as an uncompressed 24-bit TGA, the inverse of read_tga
+
+    :param filename: path of the file
+    :param pixels: uint8 array of shape (width, height, 3), indexed [x][y] with y=0 the bottom row
+    :return:
+    """
+    width, height = pixels.shape[:2]
+    header = bytearray(TGA_HEADER)
+    header[2] = TGA_TRUE_COLOUR
+    header[12:14] = width.to_bytes(2, "little")
+    header[14:16] = height.to_bytes(2, "little")
+    header[16] = 24
+    with open(filename, "wb") as f:
+        f.write(header)
+        f.write(np.ascontiguousarray(pixels.transpose(1, 0, 2)[:, :, ::-1], dtype=np.uint8).tobytes())  # bottom row first
+
+
+def pack_colours(pixels):
+    """
+    Packs RGB pixels into single integers so colours can be compared in one operation
+
+    :param pixels: uint8 array of shape (..., 3)
+    :return: int32 array with the channels packed as 0xRRGGBB
+    """
+    pixels = pixels.astype(np.int32)
+    return (pixels[..., 0] << 16) | (pixels[..., 1] << 8) | pixels[..., 2]
+
+
+def pack_colour(colour):
+    """
+    Packs a single RGB tuple into an integer, matching pack_colours
+
+    :param colour: RGB tuple
+    :return: 0xRRGGBB integer
+    """
+    return (colour[0] << 16) | (colour[1] << 8) | colour[2]
+
+
+def unpack_colour(packed):
+    """
+    Unpacks an integer produced by pack_colour/pack_colours into an RGB tuple
+
+    :param packed: 0xRRGGBB integer
+    :return: RGB tuple
+    """
+    packed = int(packed)
+    return (packed >> 16) & 0xFF, (packed >> 8) & 0xFF, packed & 0xFF
+
+
+def index_settlements(pixels):
+    """
+    Builds lookups from each region colour to its settlement (and port) tile in a single pass over map_regions.
+    A settlement/port pixel belongs to every region colour found directly above, below, left or right of it.
+
+    :param pixels: region map, should be preprocessed using pixel_array
+    :return: dict of region colour -> settlement X,Y, dict of region colour -> port X,Y
+    """
+    width, height = pixels.shape[:2]
+    packed = pack_colours(pixels)
+
+    settlements = {}
+    ports = {}
+    for marker, index in ((COL_SETTLE, settlements), (COL_PORT, ports)):
+        for x, y in np.argwhere(packed == pack_colour(marker)):
+            x, y = int(x), int(y)
+            for nx, ny in ((x, y-1), (x, y+1), (x-1, y), (x+1, y)):
+                if 0 <= nx < width and 0 <= ny < height:
+                    index[unpack_colour(packed[nx, ny])] = (x, y)  # later pixels win, as in the old full scan
+    return settlements, ports
+
+
+def find_settlement_coords(colour, index):
+    """
+    Identifies the X,Y coord vector given a region colour & settlement index
+
+    :param colour: RGB colour of the desired region
+    :param index: settlement (or port) index, should be preprocessed using index_settlements
+    :return:
+    """
+    return index.get(colour, (0, 0))
+
+
+def region_adjacency(pixels):
+    """
+    Finds every pair of colours which touch on map_regions, comparing each pixel with its right & upper neighbour in one
+    vectorised pass over the whole map
+
+    :param pixels: region map, should be preprocessed using pixel_array
+    :return: int64 array of shape (n, 2) of packed colour pairs (see pack_colours), each pair once with the lower first
+    """
+    packed = pack_colours(pixels).astype(np.int64)
+    a = np.concatenate([packed[:-1, :].ravel(), packed[:, :-1].ravel()])
+    b = np.concatenate([packed[1:, :].ravel(), packed[:, 1:].ravel()])
+    touching = a != b
+    lo, hi = np.minimum(a[touching], b[touching]), np.maximum(a[touching], b[touching])
+    keys = np.unique((lo << 24) | hi)
+    return np.stack([keys >> 24, keys & 0xFFFFFF], axis=1)
+
+
+def placeable_mask(regions, ground_types, features):
+    """
+    Computes which tiles characters may be placed on, for the whole map at once.
+    Settlements, sea, rivers/features and any blocking ground type (sampled at 2x resolution) are excluded.
+
+    :param regions: region map, should be preprocessed using pixel_array
+    :param ground_types: ground types map (2x resolution), should be preprocessed using pixel_array
+    :param features: features map, should be preprocessed using pixel_array
+    :return: boolean array of shape (width, height), True where a tile is placeable
+    """
+    width, height = regions.shape[:2]
+
+    p_regions = pack_colours(regions)
+    mask = (p_regions != pack_colour(COL_SETTLE)) & (p_regions != pack_colour(COL_SEA))
+    mask &= pack_colours(features[:width, :height]) == pack_colour(COL_FEATURELESS)
+
+    # Each tile covers a 2x2 block of map_ground_types; any blocking colour in the block rules the tile out
+    gts = pack_colours(ground_types[:width*2, :height*2])
+    blocking = [pack_colour(c) for c in (COL_SHALLOW, COL_DEEP, COL_DENSE, COL_IMPASS, COL_MOUNT)]
+    blocked = np.isin(gts, blocking).reshape(width, 2, height, 2).any(axis=(1, 3))
+    mask &= ~blocked
+    return mask
+
+
+def passable_mask(regions, ground_types):
+    """
+    Computes which tiles armies can move across over land, for the whole map at once.
+    Sea, mountains & impassable ground block movement; forests & rivers don't, as rivers are crossed at fords & bridges
+    which map_features doesn't reliably mark. Settlements are always passable.
+
+    :param regions: region map, should be preprocessed using pixel_array
+    :param ground_types: ground types map (2x resolution), should be preprocessed using pixel_array
+    :return: boolean array of shape (width, height), True where a tile is passable
+    """
+    width, height = regions.shape[:2]
+
+    p_regions = pack_colours(regions)
+    gts = pack_colours(ground_types[:width*2, :height*2])
+    blocking = [pack_colour(c) for c in (COL_SHALLOW, COL_DEEP, COL_IMPASS, COL_MOUNT)]
+    blocked = np.isin(gts, blocking).reshape(width, 2, height, 2).any(axis=(1, 3))
+    return ((p_regions != pack_colour(COL_SEA)) & ~blocked) | (p_regions == pack_colour(COL_SETTLE))
+
+
+def label_components(mask):
+    """
+    Labels the connected areas of a boolean map, treating tiles as connected to their 4 direct neighbours.
+    Works as a union-find over every pair of neighbouring tiles at once: each round links the roots of all pairs which
+    are still apart, then flattens the trees by pointer jumping, until no pair is left apart.
+
+    :param mask: boolean array of shape (width, height)
+    :return: int32 array of shape (width, height), 0 where mask is False & a label from 1 for each area elsewhere
+    """
+    width, height = mask.shape
+    index = np.arange(width*height).reshape(width, height)
+    right = mask[:-1, :] & mask[1:, :]
+    up = mask[:, :-1] & mask[:, 1:]
+    a = np.concatenate([index[:-1, :][right], index[:, :-1][up]])
+    b = np.concatenate([index[1:, :][right], index[:, 1:][up]])
+
+    parent = np.arange(width*height)
+    while len(a):
+        ra, rb = parent[a], parent[b]
+        apart = ra != rb
+        a, b, ra, rb = a[apart], b[apart], ra[apart], rb[apart]
+        np.minimum.at(parent, np.maximum(ra, rb), np.minimum(ra, rb))  # hook the higher root onto the lower
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                break
+            parent = jumped
+
+    roots = parent.reshape(width, height)
+    _, labels = np.unique(roots[mask], return_inverse=True)
+    components = np.zeros((width, height), dtype=np.int32)
+    components[mask] = labels.ravel() + 1
+    return components
+
+
+def tile_mask(coords, shape, spread=0):
+    """
+    Marks a set of tiles, and optionally all tiles within some distance of them, on a boolean grid
+
+    :param coords: (x, y) tiles to mark
+    :param shape: (width, height) of the map
+    :param spread: number of surrounding tiles to mark in each direction, ie. 1 marks the 3x3 block around a tile
+    :return: boolean array of shape (width, height)
+    """
+    mask = np.zeros(shape, dtype=bool)
+    for x, y in coords:
+        mask[max(x-spread, 0):max(x+spread+1, 0), max(y-spread, 0):max(y+spread+1, 0)] = True
+    return mask
@@ -0,0 +1,63 @@
+# Streams generated descr_strat/descr_regions text to its destination without building the whole file in memory
+import gzip
+import os
+import tempfile
+
+BUFFER_SIZE = 1 << 16
+
+
+def write_chunks(target, chunks):
+    """
+    Writes text chunks to a file path or any writable file-like object (io.StringIO, an open gzip stream, etc).
+    Paths are written atomically: the text goes to a temporary file beside the target, which then replaces it, so a
+    rerun overwrites the previous output & a failed run never leaves a partial file behind.
+    Paths ending in .gz are gzip compressed.
+
+    :param target: path of the file, or a file-like object with a write method
+    :param chunks: iterable of text chunks, see strat_chunks & regions_chunks
+    :return:
+    """
+    if hasattr(target, "write"):
+        for chunk in chunks:
+            target.write(chunk)
+        return
+
+    directory, name = os.path.split(os.path.abspath(target))
+    fd, tmp = tempfile.mkstemp(prefix="." + name + ".", suffix=".tmp", dir=directory)
+    try:
+        if target.endswith(".gz"):
+            with open(fd, "wb", buffering=BUFFER_SIZE) as raw, gzip.open(raw, "wt") as f:
+                write_chunks(f, chunks)
+        else:
+            with open(fd, "w", buffering=BUFFER_SIZE) as f:
+                write_chunks(f, chunks)
+        os.chmod(tmp, 0o666 & ~current_umask())  # mkstemp creates the file private to the user
+        os.replace(tmp, target)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def current_umask():
+    """
+    Reads the process umask, which can only be done by setting it
+
+    :return: umask bits
+    """
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+def read_text(filename):
+    """
+    Reads back a file written by write_chunks, falling back to its gzip compressed version (filename + .gz)
+
+    :param filename: path of the uncompressed file
+    :return: file text
+    """
+    if not os.path.exists(filename) and os.path.exists(filename + ".gz"):
+        with gzip.open(filename + ".gz", "rt") as f:
+            return f.read()
+    with open(filename, "r") as f:
+        return f.read()
@@ -0,0 +1,48 @@
+# Reads descr_regions into a table of Region objects keyed by province name, and writes them back out
+import re
+from Region import Region
+
+ENTRIES = re.compile(r"^[A-Za-z_]+[ \t]*$", re.MULTILINE)  # Province names are the only unindented lines
+
+
+def parse_regions(text):
+    """
+    Parses the loaded descr_regions file into its regions
+
+    :param text: descr_regions text
+    :return: text before the first region, dict of province name -> Region (in file order)
+    """
+    bounds = [m.start() for m in ENTRIES.finditer(text)] + [len(text)]
+    regions = {}
+    for start, end in zip(bounds, bounds[1:]):
+        region = Region(text[start:end], (start, end))
+        region.parse_text()
+        regions[region.name] = region
+    return text[:bounds[0]], regions
+
+
+def regions_chunks(header, regions, strengths=None):
+    """
+    Writes the regions back out in descr_regions format, one region at a time
+
+    :param header: text before the first region
+    :param regions: dict of province name -> Region
+    :param strengths: dict of province name -> new religion strengths, for the regions which changed
+    :return: generator of descr_regions text chunks
+    """
+    strengths = strengths or {}
+    yield header
+    for name, region in regions.items():
+        yield region.to_text(strengths.get(name))
+
+
+def serialize_regions(header, regions, strengths=None):
+    """
+    Writes the regions back out in descr_regions format
+
+    :param header: text before the first region
+    :param regions: dict of province name -> Region
+    :param strengths: dict of province name -> new religion strengths, for the regions which changed
+    :return: descr_regions text
+    """
+    return "".join(regions_chunks(header, regions, strengths))
@@ -0,0 +1,252 @@
+# Runs a local generation service, so tools which generate scenarios often (ie. a previewer) don't pay for starting
+# Python & loading the campaign on every scenario. Each worker process loads & parses the campaign once, then keeps it
+# resident; requests are accepted over HTTP by an asyncio server & handed to the workers.
+#
+# Usage: python service.py --port 8642 --workers 2 --out previews
+#
+# Requests (JSON bodies, JSON responses):
+#   POST /generate {"seed": 7, "name": "preview", "overrides": {"FUNDS_DEF": 8000, "STARTING_CULT": 50}}
+#   POST /reroll   {"name": "preview", "factions": ["sicily", "hre"], "seed": 3}
+#   GET  /health
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from CampaignGenerator import CampaignGenerator, PLACEMENT_MODES
+
+# Generation parameters which requests may override, and the CampaignGenerator attribute each one sets
+OVERRIDES = {
+    "FUNDS_DEF": "funds_def",
+    "FUNDS_PER": "funds_per",
+    "PURSE_DEF": "purse_def",
+    "PURSE_PER": "purse_per",
+    "STARTING_CULT": "starting_cult",
+    "NEIGHBOUR_CULT": "neighbour_cult",
+    "PLACEMENT_MODE": "placement_mode",
+    "PLACEMENT_RADIUS": "placement_radius",
+    "PLACEMENT_MAX_RADIUS": "placement_max_radius",
+    "CAPITAL_MIN_DISTANCE": "capital_min_distance",
+    "REQUIRE_REACHABLE": "require_reachable",
+}
+# Allowed range (lowest, highest or None) of each numeric parameter
+LIMITS = {
+    "FUNDS_DEF": (0, None),
+    "FUNDS_PER": (0, None),
+    "PURSE_DEF": (0, None),
+    "PURSE_PER": (0, None),
+    "STARTING_CULT": (0, 100),
+    "NEIGHBOUR_CULT": (0, 100),
+    "PLACEMENT_RADIUS": (1, None),
+    "PLACEMENT_MAX_RADIUS": (1, None),
+    "CAPITAL_MIN_DISTANCE": (0, None),
+}
+UNSUPPORTED = ("CITIES_PER", "REMOVE_GENERALS")  # parameters generation doesn't use yet, rejected rather than ignored
+MAX_BODY = 1 << 20  # largest request body accepted, in bytes
+STATUS = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+Generator = CampaignGenerator()  # campaign inputs stay loaded in each worker process between requests
+
+
+def warm():
+    """
+    Loads the campaign in a new worker process, so its first request is as fast as the rest
+
+    :return:
+    """
+    Generator.load()
+
+
+def check_seed(seed):
+    """
+    Checks a seed from a request is usable
+
+    :param seed: seed from the request
+    :return:
+    """
+    if isinstance(seed, bool) or not isinstance(seed, int) or seed < 0:
+        raise ValueError("seed must be a non-negative int")
+
+
+def apply_overrides(gen, overrides):
+    """
+    Sets generation parameters from a request, checking each against the type & range of its default
+
+    :param gen: CampaignGenerator
+    :param overrides: dict of parameter name (ie. FUNDS_DEF) -> value
+    :return: dict of attribute -> previous value, to restore afterwards
+    """
+    if not isinstance(overrides, dict):
+        raise ValueError("overrides must be a JSON object of parameter name -> value")
+    previous = {}
+    for name, value in overrides.items():
+        if name in UNSUPPORTED:
+            raise ValueError(name + " isn't used by generation yet, so it can't be overridden")
+        if name not in OVERRIDES:
+            raise ValueError("Unknown parameter " + name + ", expected one of " + ", ".join(OVERRIDES))
+        attr = OVERRIDES[name]
+        default = getattr(gen, attr)
+        if type(value) is not type(default):
+            raise ValueError(name + " must be a " + type(default).__name__)
+        if name == "PLACEMENT_MODE" and value not in PLACEMENT_MODES:
+            raise ValueError("PLACEMENT_MODE must be one of " + ", ".join(PLACEMENT_MODES))
+        low, high = LIMITS.get(name, (None, None))
+        if (low is not None and value < low) or (high is not None and value > high):
+            bound = "" if high is None else " & at most " + str(high)
+            raise ValueError(name + " must be at least " + str(low) + bound)
+        previous[attr] = default
+    radius = overrides.get("PLACEMENT_RADIUS", gen.placement_radius)
+    if overrides.get("PLACEMENT_MAX_RADIUS", gen.placement_max_radius) < radius:
+        raise ValueError("PLACEMENT_MAX_RADIUS must be at least PLACEMENT_RADIUS (" + str(radius) + ")")
+    for name, value in overrides.items():
+        setattr(gen, OVERRIDES[name], value)
+    return previous
+
+
+def scenario_dir(out_root, name):
+    """
+    Resolves the directory of a named scenario, keeping it inside the service's output directory
+
+    :param out_root: directory holding every scenario
+    :param name: scenario name from the request
+    :return: path of the scenario's directory
+    """
+    if not isinstance(name, str) or not name or name in (".", "..") or os.sep in name or "/" in name:
+        raise ValueError("Invalid scenario name " + repr(name))
+    return os.path.join(out_root, name)
+
+
+def run_request(kind, request, out_root):
+    """
+    Handles one generation or reroll request. Runs in a worker process.
+
+    :param kind: "generate" or "reroll"
+    :param request: parsed request body
+    :param out_root: directory holding every scenario
+    :return: response body
+    """
+    start = time.time()
+    if kind == "generate":
+        seed = request.get("seed", 0)
+        check_seed(seed)
+        out_dir = scenario_dir(out_root, request.get("name", "seed_" + str(seed)))
+        previous = apply_overrides(Generator, request.get("overrides", {}))  # rejects bad overrides before writing
+        try:
+            os.makedirs(out_dir, exist_ok=True)
+            Generator.generate(seed, out_dir, bool(request.get("compress", False)))
+        finally:
+            for attr, value in previous.items():
+                setattr(Generator, attr, value)
+    else:
+        factions = request.get("factions")
+        if not isinstance(factions, list) or not factions:
+            raise ValueError("factions must be a list of faction names")
+        seed = request.get("seed")
+        if seed is not None:
+            check_seed(seed)
+        out_dir = scenario_dir(out_root, request.get("name"))
+        seed = Generator.reroll(out_dir, factions, seed)
+
+    response = {"seed": seed, "dir": os.path.abspath(out_dir), "files": sorted(os.listdir(out_dir))}
+    if request.get("validate"):
+        response["validation"] = Generator.validate(out_dir)
+    if request.get("timings"):
+        response["timings"] = Generator.profiler.report()
+    response["time"] = round(time.time()-start, 4)
+    return response
+
+
+async def read_request(reader):
+    """
+    Reads an HTTP request
+
+    :param reader: asyncio StreamReader of the connection
+    :return: method, path, body bytes
+    """
+    method, path, _ = (await reader.readline()).decode("latin-1").split(" ", 2)
+    length = 0
+    while True:
+        line = (await reader.readline()).decode("latin-1").strip()
+        if not line:
+            break
+        key, _, value = line.partition(":")
+        if key.strip().lower() == "content-length":
+            length = int(value)
+    if length > MAX_BODY:
+        raise OverflowError("Request body of " + str(length) + " bytes is too large")
+    body = await reader.readexactly(length) if length else b""
+    return method, path.split("?", 1)[0], body
+
+
+async def handle(reader, writer, pool, out_root):
+    """
+    Serves one connection: parses the request, runs it on the worker pool & writes the JSON response
+
+    :param reader: asyncio StreamReader of the connection
+    :param writer: asyncio StreamWriter of the connection
+    :param pool: worker pool
+    :param out_root: directory holding every scenario
+    :return:
+    """
+    try:
+        method, path, body = await read_request(reader)
+        if method == "GET" and path == "/health":
+            status, response = 200, {"status": "ok"}
+        elif method == "POST" and path in ("/generate", "/reroll"):
+            request = json.loads(body or b"{}")
+            if not isinstance(request, dict):
+                raise ValueError("Request body must be a JSON object")
+            loop = asyncio.get_running_loop()
+            status, response = 200, await loop.run_in_executor(pool, run_request, path[1:], request, out_root)
+        else:
+            status, response = 404, {"error": "No such endpoint " + method + " " + path}
+    except OverflowError as e:
+        status, response = 413, {"error": str(e)}
+    except (ValueError, KeyError, FileNotFoundError) as e:  # bad request bodies, unknown factions or scenarios
+        status, response = 400, {"error": str(e)}
+    except Exception as e:
+        status, response = 500, {"error": type(e).__name__ + ": " + str(e)}
+
+    data = json.dumps(response).encode()
+    writer.write(("HTTP/1.1 " + str(status) + " " + STATUS[status] + "\r\nContent-Type: application/json\r\n"
+                  "Content-Length: " + str(len(data)) + "\r\nConnection: close\r\n\r\n").encode() + data)
+    try:
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+async def serve(host, port, workers, out_root):
+    """
+    Starts the worker pool, loads the campaign in every worker & serves requests until cancelled
+
+    :param host: address to listen on
+    :param port: port to listen on
+    :param workers: number of worker processes
+    :param out_root: directory to write scenarios to
+    :return:
+    """
+    os.makedirs(out_root, exist_ok=True)
+    loop = asyncio.get_running_loop()
+    with ProcessPoolExecutor(max_workers=workers, initializer=warm) as pool:
+        await asyncio.gather(*[loop.run_in_executor(pool, warm) for _ in range(workers)])  # start every worker now
+        server = await asyncio.start_server(lambda r, w: handle(r, w, pool, out_root), host, port)
+        print("SERVING ON", host + ":" + str(port), "WITH", workers, "WORKERS, WRITING TO", os.path.abspath(out_root))
+        async with server:
+            await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve scenario generation requests over local HTTP")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=8642, help="port to listen on")
+    parser.add_argument("--workers", type=int, default=2, help="worker processes, each holding the campaign")
+    parser.add_argument("--out", default="previews", help="directory to write scenarios to")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.out))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,50 @@
+# Reads descr_strat into Faction/Settlement/Character objects, and writes them back out
+import re
+from Faction import Faction
+
+SECTIONS = re.compile(r"\bfaction\s[a-z]+|\bStandings")
+
+
+def parse_strat(text):
+    """
+    Parses the loaded descr_strat file into the campaign setup, factions & diplomacy
+
+    :param text: descr_strat text
+    :return: Campaign Info, Factions[], Diplomacy
+    """
+    bounds = [m.start() for m in SECTIONS.finditer(text)]
+    factions = []
+    for start, end in zip(bounds, bounds[1:]):
+        faction = Faction(text[start:end])
+        faction.parse_text()
+        factions.append(faction)
+    return text[:bounds[0]], factions, text[bounds[-1]:]
+
+
+def strat_chunks(campaign, factions, diplomacy, changed=None):
+    """
+    Writes the campaign setup, factions & diplomacy back out in descr_strat format, one faction block at a time
+
+    :param campaign: Campaign Information
+    :param factions: Factions, in the order they should be written
+    :param diplomacy: Diplomacy Information
+    :param changed: names of the factions which changed since they were parsed, or None if they all may have; the
+    rest are copied out as they were read
+    :return: generator of descr_strat text chunks
+    """
+    yield campaign
+    for fac in factions:
+        yield fac.to_text() if changed is None or fac.name in changed else fac.text
+    yield diplomacy
+
+
+def serialize_strat(campaign, factions, diplomacy):
+    """
+    Writes the campaign setup, factions & diplomacy back out in descr_strat format
+
+    :param campaign: Campaign Information
+    :param factions: Factions, in the order they should be written
+    :param diplomacy: Diplomacy Information
+    :return: descr_strat text
+    """
+    return "".join(strat_chunks(campaign, factions, diplomacy))
@@ -0,0 +1,232 @@
+# Builds synthetic campaigns of any size (descr_strat, descr_regions, TGA maps, names, cultures & army templates)
+# laid out the same way as the bundled campaign, so the generator can be exercised on maps far larger than it ships with.
+#
+# Usage: python synthetic_campaign.py --factions 48 --settlements 6 --rebels 250 --size 1024 1024 --out synthetic
+import argparse
+import os
+import shutil
+import string
+
+import numpy as np
+from map_extraction import COL_MOUNT, COL_SETTLE, COL_SEA, write_tga
+
+RELIGIONS = ["catholic", "orthodox", "islam", "heretic", "pagan"]
+TIERS = ["village", "town", "large_town", "city", "large_city", "huge_city"]
+UNITS = ["Militia", "Spearmen", "Archers", "Cavalry", "Bodyguard"]
+
+
+def label(i, prefix):
+    """
+    Names the i-th synthetic faction/region/character using letters only, as descr_strat names can't contain digits
+
+    :param i: index of the entity
+    :param prefix: prefix of the name
+    :return: name, ie. prefix + "a", "b", ... "z", "ba", ...
+    """
+    letters = ""
+    while True:
+        letters = string.ascii_lowercase[i % 26] + letters
+        i //= 26
+        if not i:
+            return prefix + letters
+
+
+def region_layout(regions, width, height):
+    """
+    Splits the map into a grid of rectangular regions, with each settlement at the centre of its cell
+
+    :param regions: number of regions
+    :param width: width of map_regions
+    :param height: height of map_regions
+    :return: region index of every tile (-1 for sea), array of shape (regions, 2) holding each settlement's X, Y
+    """
+    cols = int(np.ceil(np.sqrt(regions * width / height)))
+    rows = int(np.ceil(regions / cols))
+    if width < cols * 3 or height < rows * 3:
+        raise ValueError("Map of " + str(width) + "x" + str(height) + " is too small for " + str(regions) + " regions")
+    cell_w, cell_h = width // cols, height // rows
+
+    xs, ys = np.meshgrid(np.arange(width), np.arange(height), indexing="ij")
+    index = np.minimum(xs // cell_w, cols-1) + np.minimum(ys // cell_h, rows-1) * cols
+    index[index >= regions] = -1  # unused cells at the end of the last row become sea
+
+    i = np.arange(regions)
+    settlements = np.stack([(i % cols) * cell_w + cell_w // 2, (i // cols) * cell_h + cell_h // 2], axis=1)
+    return index, settlements
+
+
+def region_colours(regions):
+    """
+    Picks a distinct colour for each region, avoiding the colours reserved for settlements, ports & sea
+
+    :param regions: number of regions
+    :return: uint8 array of shape (regions, 3)
+    """
+    i = np.arange(regions)
+    colours = np.stack([1 + i % 250, 1 + (i // 250) % 250, np.full(regions, 128)], axis=1)
+    return colours.astype(np.uint8)
+
+
+def write_maps(directory, index, settlements, colours, blocked, rng):
+    """
+    Writes map_regions, map_ground_types & map_features
+
+    :param directory: campaign directory
+    :param index: region index of every tile, see region_layout
+    :param settlements: X, Y of each settlement
+    :param colours: colour of each region
+    :param blocked: fraction of ground-type pixels which are mountains
+    :param rng: numpy Generator
+    :return:
+    """
+    width, height = index.shape
+    regions = colours[np.maximum(index, 0)]
+    regions[index < 0] = COL_SEA
+    regions[settlements[:, 0], settlements[:, 1]] = COL_SETTLE
+    write_tga(os.path.join(directory, "map_regions.tga"), regions)
+
+    ground = np.zeros((width*2+1, height*2+1, 3), dtype=np.uint8)  # ground types are sampled at twice the resolution
+    ground[:] = (0, 128, 0)
+    ground[rng.random(ground.shape[:2]) < blocked] = COL_MOUNT
+    write_tga(os.path.join(directory, "map_ground_types.tga"), ground)
+
+    write_tga(os.path.join(directory, "map_features.tga"), np.zeros((width, height, 3), dtype=np.uint8))
+
+
+def settlement_text(region, tier, creator):
+    """
+    Writes a descr_strat settlement entry
+
+    :param region: province name
+    :param tier: settlement level
+    :param creator: faction which founded the settlement
+    :return: descr_strat text
+    """
+    return ("settlement\n{\n\tlevel " + tier + "\n\tregion " + region + "\n\n\tyear_founded 0\n\tpopulation 800\n"
+            "\tplan_set default_set\n\tfaction_creator " + creator + "\n\n\tbuilding\n\t{\n"
+            "\t\ttype core_building wooden_pallisade\n\t}\n}\n\n")
+
+
+def character_text(name, kind, pos, leader=False, sub_faction=None):
+    """
+    Writes a descr_strat character entry with a small army
+
+    :param name: character name
+    :param kind: character type (named character, general, etc)
+    :param pos: X, Y of the character
+    :param leader: whether the character leads the faction
+    :param sub_faction: faction of a rebel army
+    :return: descr_strat text
+    """
+    prefix = "sub_faction " + sub_faction + ", " if sub_faction else ""
+    status = "leader, " if leader else ""
+    return ("character\t" + prefix + name + ", " + kind + ", male, " + status + "age 30, x " + str(pos[0]) + ", y "
+            + str(pos[1]) + "\narmy\nunit\t\tMilitia\t\texp 0 armour 0 weapon_lvl 0\n\n")
+
+
+def write_campaign(directory, factions=8, settlements=3, rebels=20, characters=4, size=(256, 256), forts=0.2,
+                   blocked=0.1, seed=0):
+    """
+    Writes a complete synthetic campaign: campaign/ (descr_strat, descr_regions & the maps) plus descr_names,
+    descr_sm_factions & defaults/ beside it, ready for CampaignGenerator to run from that directory
+
+    :param directory: directory to write to
+    :param factions: number of playable factions
+    :param settlements: settlements owned by each faction
+    :param rebels: additional settlements owned by the rebels
+    :param characters: characters (including the leader) in each faction
+    :param size: width, height of map_regions
+    :param forts: fraction of regions with a fort
+    :param blocked: fraction of ground-type pixels which are mountains
+    :param seed: seed for the layout of mountains, forts & characters
+    :return: number of regions
+    """
+    rng = np.random.default_rng(seed)
+    campaign = os.path.join(directory, "campaign")
+    os.makedirs(os.path.join(directory, "defaults", "armies"), exist_ok=True)
+    os.makedirs(campaign, exist_ok=True)
+
+    count = factions * settlements + rebels
+    names = [label(i, "fac_") for i in range(factions)]
+    provinces = [label(i, "Reg_") + "_Province" for i in range(count)]
+    index, coords = region_layout(count, *size)
+    colours = region_colours(count)
+    write_maps(campaign, index, coords, colours, blocked, rng)
+
+    # descr_strat
+    strat = ["campaign imperial_campaign\n\nplayable\n"] + ["\t" + n + "\n" for n in names]
+    strat.append("end\nunlockable\nend\nnonplayable\n\tpapal_states\n\tscripts\n\tslave\nend\n\n"
+                 "start_date\t1 summer\nend_date\t100 winter\ntimescale\t0.25\n\n")
+    for f, name in enumerate(names):
+        strat.append("faction\t" + name + ", balanced smith\nai_label default\ndenari\t10000\n"
+                     "denari_kings_purse\t0\n\n")
+        owned = range(f * settlements, (f+1) * settlements)
+        strat.extend(settlement_text(provinces[r], TIERS[r % len(TIERS)], name) for r in owned)
+        capital = coords[owned[0]]
+        for c in range(characters):
+            pos = capital if c == 0 else np.clip(capital + rng.integers(-3, 4, 2), 0, np.array(size)-1)
+            strat.append(character_text(label(c, "Name_"), "named character", pos, leader=c == 0))
+        strat.append("character_record\tName_old, male, age 80, dead 0, past_leader\n\n")
+    strat.append("faction\tpapal_states, balanced smith\nai_label papal_faction\ndenari\t10000\n"
+                 "denari_kings_purse\t5\n\n")
+    strat.append("faction scripts, fortified knud\nai_label default\ndenari\t0\ndenari_kings_purse\t0\n\n")
+    strat.append("faction\tslave, balanced mao\nai_label default\ndenari\t0\ndenari_kings_purse\t0\n\n")
+    for r in range(factions * settlements, count):
+        strat.append(settlement_text(provinces[r], TIERS[r % len(TIERS)], names[r % factions]))
+    for r in range(factions * settlements, count):
+        pos = np.clip(coords[r] + rng.integers(-3, 4, 2), 0, np.array(size)-1)
+        strat.append(character_text(label(r, "Rebel_"), "general", pos, sub_faction=names[r % factions]))
+    strat.append(";##### Diplomacy - Standings #####\n\n")
+    for r in np.flatnonzero(rng.random(count) < forts):
+        x, y = coords[r] + (2, 2)
+        strat.append("region " + provinces[r] + "\nfarming_level 0\nfamine_threat 0\nfort\t" + str(x) + " "
+                     + str(y) + " stone_fort_b culture northern_european\n\n")
+    strat.append("script\ncampaign_script.txt\n")
+    with open(os.path.join(campaign, "descr_strat.txt"), "w") as f:
+        f.writelines(strat)
+
+    # descr_regions
+    with open(os.path.join(campaign, "descr_regions.txt"), "w") as f:
+        f.write(";synthetic campaign\n\n")
+        for r, province in enumerate(provinces):
+            strengths = rng.multinomial(100, np.full(len(RELIGIONS), 1/len(RELIGIONS)))
+            cults = " ".join(rel + " " + str(s) for rel, s in zip(RELIGIONS, strengths))
+            f.write(province + "\n\tlegion: " + province + "\n\t" + province[:-9] + "\n\t" + names[r % factions]
+                    + "\n\tRebels\n\t" + " ".join(str(c) for c in colours[r]) + "\n\tgrassland\n\t5\n\t1\n"
+                    "\treligions { " + cults + " }\n")
+
+    # descr_names, descr_sm_factions & army templates
+    with open(os.path.join(directory, "descr_names.txt"), "w") as f:
+        for name in names:
+            f.write("faction: " + name + "\n\n\tcharacters\n")
+            f.writelines("\t\t" + label(i, "Name_") + "\n" for i in range(characters * 4))
+            f.write("\n\twomen\n\t\tName_woman\n\n")
+    with open(os.path.join(directory, "descr_sm_factions.txt"), "w") as f:
+        for i, name in enumerate(names):
+            f.write("faction\t\t\t" + name + "\nculture\t\t\tsynthetic\nreligion\t\t" + RELIGIONS[i % len(RELIGIONS)]
+                    + "\n\n")
+    for name in names:
+        with open(os.path.join(directory, "defaults", "armies", name + ".txt"), "w") as f:
+            f.write("".join("#" + rank + "\n" + "".join("unit\t\t" + name + " " + unit + "\t\texp 0 armour 0 "
+                                                         "weapon_lvl 0\n" for unit in UNITS[i:i+2])
+                            for i, rank in enumerate(["STANDARD", "UNCOMMON", "RARE", "BG"])))
+    for template in ("diplomat.txt", "rebel_army.txt"):
+        shutil.copy(os.path.join(os.path.dirname(os.path.abspath(__file__)), "defaults", template),
+                    os.path.join(directory, "defaults", template))
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic campaign")
+    parser.add_argument("--factions", type=int, default=8, help="playable factions")
+    parser.add_argument("--settlements", type=int, default=3, help="settlements per faction")
+    parser.add_argument("--rebels", type=int, default=20, help="additional rebel settlements")
+    parser.add_argument("--characters", type=int, default=4, help="characters per faction")
+    parser.add_argument("--size", type=int, nargs=2, default=[256, 256], help="width & height of map_regions")
+    parser.add_argument("--seed", type=int, default=0, help="layout seed")
+    parser.add_argument("--out", default="synthetic", help="output directory")
+    args = parser.parse_args()
+
+    regions = write_campaign(args.out, args.factions, args.settlements, args.rebels, args.characters,
+                             tuple(args.size), seed=args.seed)
+    print("WROTE", regions, "REGIONS TO", args.out)
@@ -0,0 +1,45 @@
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from ReligionMatrix import ReligionMatrix
+
+
+def regions():
+    """
+    Three provinces: a capital & neighbour listing catholic, and a neighbour which doesn't
+
+    :return: dict of province name -> region
+    """
+    return {
+        "Capital": SimpleNamespace(religions=["catholic", "orthodox"], strengths=[30, 70]),
+        "Listed": SimpleNamespace(religions=["catholic", "orthodox"], strengths=[10, 90]),
+        "Unlisted": SimpleNamespace(religions=["islam", "orthodox"], strengths=[60, 40]),
+    }
+
+
+class ConvertTest(unittest.TestCase):
+    def test_unlisted_neighbour_skipped(self):
+        matrix = ReligionMatrix(regions())
+        rows = matrix.convert(["Capital", "Listed", "Unlisted"], ["catholic"] * 3, 20, skip_unlisted=True)
+        matrix.normalise(rows)
+
+        self.assertEqual(matrix.changes(rows), {"Capital": [50, 50], "Listed": [30, 70]})
+        self.assertEqual(matrix.changes([matrix.rows["Unlisted"]]), {"Unlisted": [60, 40]})
+
+    def test_unknown_religion_skipped(self):
+        matrix = ReligionMatrix(regions())
+        rows = matrix.convert(["Capital", "Unlisted"], ["pagan", "pagan"], 20, skip_unlisted=True)
+        self.assertEqual(len(rows), 0)
+
+    def test_unlisted_raises_by_default(self):
+        matrix = ReligionMatrix(regions())
+        with self.assertRaises(ValueError):
+            matrix.convert(["Capital", "Unlisted"], ["catholic", "catholic"], 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+# Checks a generated descr_strat against the campaign maps & regions without loading it in the game: characters off the
+# map, on blocked terrain or sharing a tile, settlements in unknown regions, held twice or missing, and factions without
+# a capital.
+#
+# Usage: python validator.py seeds/seed_1 seeds/seed_2 --report report.json
+import argparse
+import json
+import sys
+
+import numpy as np
+
+
+def validate_factions(factions, regions, placeable, settlements, playable, inherited=()):
+    """
+    Checks every character & settlement of a generated scenario.
+    Character positions are gathered into one array so the terrain & duplicate checks run once over all of them.
+
+    :param factions: Factions of the scenario, as parsed from the generated descr_strat
+    :param regions: Region table keyed by province name
+    :param placeable: boolean array of tiles characters may stand on, see placeable_mask
+    :param settlements: boolean array, True on settlement tiles (where leaders & garrisons stand)
+    :param playable: names of the factions which must hold a capital
+    :param inherited: errors already present in the source campaign (see error_key), which don't fail validation
+    :return: report dict with "valid", "counts" & lists of "errors" & "inherited" errors, each naming its check
+    """
+    errors = []
+    chars = [(fac.name, ch) for fac in factions for ch in fac.characters]
+    pos = np.array([ch.position for _, ch in chars], dtype=np.int64).reshape(-1, 2)
+    width, height = placeable.shape
+
+    on_map = (pos[:, 0] >= 0) & (pos[:, 0] < width) & (pos[:, 1] >= 0) & (pos[:, 1] < height)
+    x, y = np.where(on_map, pos[:, 0], 0), np.where(on_map, pos[:, 1], 0)
+    standable = on_map & (placeable[x, y] | settlements[x, y])
+    keys = pos[:, 0] * (height+1) + pos[:, 1]
+    _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    shared = counts[inverse.ravel()] > 1
+
+    for i in np.flatnonzero(~on_map):
+        errors.append(char_error("off_map", chars[i]))
+    for i in np.flatnonzero(on_map & ~standable):
+        errors.append(char_error("blocked_terrain", chars[i]))
+    for i in np.flatnonzero(shared):
+        errors.append(char_error("shared_tile", chars[i]))
+
+    owners = {}
+    for fac in factions:
+        for settlement in fac.settlements:
+            if settlement.name not in regions:
+                errors.append({"check": "unknown_settlement", "faction": fac.name, "settlement": settlement.name})
+            if settlement.name in owners:
+                errors.append({"check": "settlement_held_twice", "faction": fac.name, "settlement": settlement.name,
+                               "other": owners[settlement.name]})
+            owners[settlement.name] = fac.name
+    for name in regions:
+        if name not in owners:
+            errors.append({"check": "missing_settlement", "settlement": name})
+
+    for fac in factions:
+        if fac.name in playable and not fac.settlements:
+            errors.append({"check": "missing_capital", "faction": fac.name})
+
+    inherited = set(inherited)
+    old = [e for e in errors if error_key(e) in inherited]
+    errors = [e for e in errors if error_key(e) not in inherited]
+    return {
+        "valid": not errors,
+        "counts": {"characters": len(chars), "settlements": len(owners), "errors": len(errors),
+                   "inherited": len(old)},
+        "errors": errors,
+        "inherited": old,
+    }
+
+
+def error_key(error):
+    """
+    Identifies an error independently of the scenario it was found in
+
+    :param error: error dict
+    :return: hashable key
+    """
+    return tuple(sorted((k, tuple(v) if isinstance(v, list) else v) for k, v in error.items()))
+
+
+def char_error(check, char):
+    """
+    Describes a failed character check
+
+    :param check: name of the check
+    :param char: (faction name, Character)
+    :return: error dict
+    """
+    fac, ch = char
+    return {"check": check, "faction": fac, "character": ch.name, "position": [int(ch.position[0]),
+                                                                               int(ch.position[1])]}
+
+
+if __name__ == "__main__":
+    from CampaignGenerator import CampaignGenerator
+
+    parser = argparse.ArgumentParser(description="Validate generated scenarios")
+    parser.add_argument("dirs", nargs="+", help="scenario output directories")
+    parser.add_argument("--report", default=None, help="write the reports to this JSON file")
+    args = parser.parse_args()
+
+    generator = CampaignGenerator()
+    reports = {d: generator.validate(d) for d in args.dirs}
+    for d, report in reports.items():
+        print(d, "VALID" if report["valid"] else "INVALID (" + str(report["counts"]["errors"]) + " errors)")
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(reports, f, indent=1)
+    sys.exit(0 if all(r["valid"] for r in reports.values()) else 1)